@@ -1,28 +1,90 @@
 from flask import Flask, render_template, send_from_directory
 from flask_login import LoginManager
-from .extensions import db
+from .extensions import db, identity_cache, cart_counts, auth_limiter, password_hasher, invalidation_bus
+from .startup import StartupProfile
 import os
 
 def create_app():
+    # STARTUP_PROFILE=1 reports how long each step below takes
+    profile = StartupProfile.from_env()
     app = Flask(__name__, instance_relative_config=True)
 
+    # Ensure instance folder exists
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    # Jinja bytecode cache under instance/; set up before jinja_env is created
+    from .templating import init_templates, warm_templates
+    init_templates(app)
+    profile.mark('flask app')
+
     # -------------------- BASIC CONFIG -------------------- #
     app.config['SECRET_KEY'] = 'your_secret_key'
 
-    # Ensure instance folder exists
-    os.makedirs(app.instance_path, exist_ok=True)
+    # -------------------- PASSWORD POLICY -------------------- #
+    # Hashes made with a different policy are upgraded on the next login.
+    app.config['PASSWORD_HASH_ALGORITHM'] = os.environ.get('PASSWORD_HASH_ALGORITHM', 'sha256')
+    app.config['PASSWORD_HASH_ITERATIONS'] = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+
+    # Hash on a process pool so threaded workers don't serialize on the GIL
+    # (0 = hash inline). Calls fall back to inline after the timeout.
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    app.config['PASSWORD_HASH_TIMEOUT'] = 5
+    password_hasher.init_app(app)
+    profile.mark('config')
+
+    # Token bucket for /login and /sign-up: burst size and tokens per second
+    app.config['AUTH_RATE_LIMIT_BURST'] = int(os.environ.get('AUTH_RATE_LIMIT_BURST', 10))
+    app.config['AUTH_RATE_LIMIT_PER_SECOND'] = float(os.environ.get('AUTH_RATE_LIMIT_PER_SECOND', 10 / 60))
 
     # -------------------- DATABASE SETUP -------------------- #
     db_path = os.path.join(app.instance_path, 'database.sqlite3')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f"sqlite:///{db_path}")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     db.init_app(app)
 
+    # Storefront and report reads can go to a read engine; writes stay on
+    # the primary. Override SQLALCHEMY_READ_URI to use a replica.
+    from .routing import init_read_routing
+    app.config['SQLALCHEMY_READ_URI'] = os.environ.get('SQLALCHEMY_READ_URI')
+    init_read_routing(app, db)
+    profile.mark('database')
+
+    # -------------------- CACHE INVALIDATION -------------------- #
+    # How product/customer/cart change events reach other workers:
+    # 'local' (none), 'socket' (UNIX sockets, one host), 'sqlite' (polled
+    # table in this database) or 'redis' (INVALIDATION_BROKER_URL).
+    app.config['INVALIDATION_TRANSPORT'] = os.environ.get('INVALIDATION_TRANSPORT', 'local')
+    app.config['INVALIDATION_BROKER_URL'] = os.environ.get('INVALIDATION_BROKER_URL')
+    invalidation_bus.init_app(app)
+
+    # With a shared transport, caches only expire as a backstop
+    default_ttl = 3600 if invalidation_bus.shared else None
+
     # -------------------- MEDIA FOLDER -------------------- #
     media_folder = os.path.join(app.root_path, 'media')
     os.makedirs(media_folder, exist_ok=True)
     app.config['MEDIA_FOLDER'] = media_folder
 
+    # -------------------- GUEST CART -------------------- #
+    # Anonymous carts live in the signed session cookie (see guest_cart.py)
+    app.config['GUEST_CART_TTL'] = 7 * 24 * 3600
+
+    # -------------------- CHECKOUT -------------------- #
+    # Seconds a signed order-review quote stays valid for confirm_order
+    app.config['CHECKOUT_QUOTE_TTL'] = 15 * 60
+
+    # -------------------- UPLOAD LIMITS -------------------- #
+    # Requests larger than this are rejected before the body is read.
+    # Per-type limits apply when the file is copied into media/, and as
+    # bytes arrive on the chunked upload endpoint (see uploads.py).
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    app.config['UPLOAD_SIZE_LIMITS'] = {
+        'image/png': 8 * 1024 * 1024,
+        'image/jpeg': 8 * 1024 * 1024,
+        'image/gif': 4 * 1024 * 1024,
+        'image/webp': 8 * 1024 * 1024,
+    }
+
     @app.route('/media/<path:filename>')
     def media(filename):
         return send_from_directory(app.config['MEDIA_FOLDER'], filename)
@@ -32,10 +94,57 @@ def create_app():
     login_manager.login_view = 'auth.login'
     login_manager.init_app(app)
 
-    from .models import Customer
+    # Identity and cart-count caches; entries are dropped by 'customer' and
+    # 'cart' events on the invalidation bus.
+    identity_cache.ttl = app.config.setdefault('USER_CACHE_TTL', default_ttl or 30)
+    cart_counts.ttl = app.config.setdefault('CART_COUNT_TTL', default_ttl or 30)
+
+    auth_limiter.capacity = app.config['AUTH_RATE_LIMIT_BURST']
+    auth_limiter.rate = app.config['AUTH_RATE_LIMIT_PER_SECOND']
+
+    from .models import Customer, CustomerSnapshot
     @login_manager.user_loader
     def load_user(user_id):
-        return Customer.query.get(int(user_id))
+        user_id = int(user_id)
+        snapshot = identity_cache.get(user_id)
+        if snapshot is None:
+            customer = Customer.query.get(user_id)
+            if customer is None:
+                return None
+            snapshot = CustomerSnapshot.from_customer(customer)
+            identity_cache.set(user_id, snapshot)
+        return snapshot
+
+    profile.mark('login manager')
+
+    # -------------------- PRODUCT CATALOG -------------------- #
+    # Listing read model, kept current by 'product' events; rebuilt fully
+    # after CATALOG_TTL seconds as a backstop
+    from .catalog import catalog
+    catalog.ttl = app.config.setdefault('CATALOG_TTL', default_ttl or 60)
+    catalog.low_stock_threshold = app.config.setdefault('LOW_STOCK_THRESHOLD', 5)
+
+    def on_product(product_id):
+        if product_id is None:
+            catalog.invalidate()
+        else:
+            catalog.refresh(product_id)
+
+    def on_customer(customer_id):
+        if customer_id is None:
+            identity_cache.clear()
+        else:
+            identity_cache.invalidate(customer_id)
+
+    def on_cart(customer_id):
+        if customer_id is None:
+            cart_counts.clear()
+        else:
+            cart_counts.invalidate(customer_id)
+
+    invalidation_bus.subscribe('product', on_product)
+    invalidation_bus.subscribe('customer', on_customer)
+    invalidation_bus.subscribe('cart', on_cart)
 
     # -------------------- BLUEPRINTS -------------------- #
     from .views import views
@@ -45,13 +154,25 @@ def create_app():
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(admin, url_prefix='/')
+    profile.mark('blueprints')
+
+    # -------------------- CLI COMMANDS -------------------- #
+    # Schema creation and migration live in `flask init-db`, so worker boot
+    # does no schema work. SCHEMA_ON_BOOT=1 restores the old behaviour.
+    from .commands import register_commands, init_db
+    register_commands(app)
 
-    # -------------------- DATABASE CREATION -------------------- #
-    if not os.path.exists(db_path):
+    if os.environ.get('SCHEMA_ON_BOOT', '') not in ('', '0'):
         with app.app_context():
-            db.create_all()
-            print("Database created!")
-    else:
-        print("Existing database detected — using it.")
+            init_db()
+        profile.mark('schema')
+
+    # -------------------- TEMPLATE WARM-UP -------------------- #
+    # Compile every template now (from bytecode when cached) so the first
+    # requests after a deploy don't pay for it. TEMPLATE_WARMUP=0 skips it.
+    if os.environ.get('TEMPLATE_WARMUP', '1') not in ('', '0'):
+        warm_templates(app)
+        profile.mark('templates')
 
+    profile.report()
     return app
\ No newline at end of file
@@ -1,9 +1,14 @@
-from flask import Blueprint, current_app, request, render_template, flash, send_from_directory, redirect, url_for
+from flask import Blueprint, current_app, request, render_template, flash, send_from_directory, redirect, url_for, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from .forms import ShopItemsForm, OrderForm
-from .models import Product, Order, Customer, Cart     # <-- IMPORTANT: Added Cart
-from .extensions import db
+from .models import Product, Category, Order, Customer, Cart, OrderArchive     # <-- IMPORTANT: Added Cart
+from .extensions import db, invalidation_bus
+from .catalog import catalog
+from .categories import category_registry
+from .inventory import adjust_stock, set_stock
+from .routing import read_only
+from .uploads import save_upload, UploadError, check_content_length, partial_offset, append_chunk, finish_chunked
 import os
 import re
 
@@ -19,14 +24,8 @@ def sanitize_filename(filename: str) -> str:
     return filename.strip().rstrip('.')
 
 def save_file(file) -> str:
-    upload_folder = os.path.join(current_app.root_path, 'media')
-    os.makedirs(upload_folder, exist_ok=True)
-
-    filename = sanitize_filename(file.filename)
-    file_path = os.path.join(upload_folder, filename)
-    file.save(file_path)
-
-    return f'/media/{filename}'
+    file.filename = sanitize_filename(file.filename)
+    return save_upload(file)
 
 def admin_required():
     """Return 404 unless the user is admin (id=1)."""
@@ -56,6 +55,38 @@ def media(filename):
 
     return "Image not found", 404
 
+# ---------------- Chunked Uploads ---------------- #
+
+@admin.route('/upload-chunk/<upload_id>', methods=['GET', 'POST'])
+@login_required
+def upload_chunk(upload_id):
+    """
+    Resumable upload for large product images.
+
+    GET returns the offset the server already has. POST appends the raw
+    request body at ?offset=N; with ?final=1&filename=... the upload is
+    moved into media/ and its URL returned.
+    """
+    if admin_required():
+        return jsonify({'error': 'Not found'}), 404
+
+    try:
+        if request.method == 'GET':
+            return jsonify({'offset': partial_offset(upload_id)})
+
+        check_content_length(request.content_length)
+        offset = append_chunk(upload_id, request.args.get('offset', 0, type=int), request.stream)
+
+        if request.args.get('final'):
+            url = finish_chunked(upload_id, sanitize_filename(request.args.get('filename', '')))
+            return jsonify({'offset': offset, 'url': url})
+
+        return jsonify({'offset': offset})
+
+    except UploadError as e:
+        # Client re-syncs with a GET and resumes from the returned offset
+        return jsonify({'error': str(e)}), 409
+
 # ---------------- Product Routes ---------------- #
 
 @admin.route('/add-shop-items', methods=['GET', 'POST'])
@@ -65,28 +96,39 @@ def add_shop_items():
         return admin_required()
 
     form = ShopItemsForm()
+    form.category.choices = category_registry.choices()
 
     if form.validate_on_submit():
         file = form.product_picture.data
-        if not file or not file.filename:
+        picture_url = form.uploaded_picture.data
+
+        if not picture_url and (not file or not file.filename):
             flash("Please upload a product image.")
             return render_template('add_shop_items.html', form=form)
 
-        picture_url = save_file(file)
+        if not picture_url:
+            try:
+                picture_url = save_file(file)
+            except UploadError as e:
+                flash(str(e))
+                return render_template('add_shop_items.html', form=form)
 
         new_item = Product(
             product_name=form.product_name.data,
             current_price=form.current_price.data,
             previous_price=form.previous_price.data,
-            in_stock=form.in_stock.data,
+            in_stock=0,
             flash_sale=form.flash_sale.data,
-            category=form.category.data,
+            category_id=form.category.data,
             product_picture=picture_url
         )
 
         try:
             db.session.add(new_item)
+            db.session.flush()
+            adjust_stock(new_item, form.in_stock.data, 'opening')
             db.session.commit()
+            invalidation_bus.publish('product', new_item.id)
             flash(f"{new_item.product_name} added successfully")
             return redirect(url_for('admin.shop_items'))
         except Exception as e:
@@ -98,6 +140,7 @@ def add_shop_items():
 
 @admin.route('/shop-items')
 @login_required
+@read_only
 def shop_items():
     if admin_required():
         return admin_required()
@@ -106,9 +149,9 @@ def shop_items():
 
     if search:
         # Search by product name OR category (case-insensitive)
-        items = Product.query.filter(
+        items = Product.query.outerjoin(Category, Product.category_id == Category.id).filter(
             (Product.product_name.ilike(f"%{search}%")) |
-            (Product.category.ilike(f"%{search}%"))
+            (Category.name.ilike(f"%{search}%"))
         ).order_by(Product.date_added).all()
     else:
         items = Product.query.order_by(Product.date_added).all()
@@ -126,22 +169,32 @@ def update_item(item_id):
     # Fetch the item or return 404
     item = Product.query.get_or_404(item_id)
     form = ShopItemsForm(obj=item)  # pre-fill form with existing data
+    form.category.choices = category_registry.choices()
+    if request.method == 'GET':
+        form.category.data = item.category_id
 
     if form.validate_on_submit():
         # Update all fields directly
         item.product_name = form.product_name.data
         item.previous_price = form.previous_price.data
         item.current_price = form.current_price.data
-        item.in_stock = form.in_stock.data
+        set_stock(item, form.in_stock.data)
         item.flash_sale = form.flash_sale.data  # checkbox handled correctly
-        item.category = form.category.data
+        item.category_id = form.category.data
 
-        # Handle file upload
-        if form.product_picture.data and form.product_picture.data.filename:
-            item.product_picture = save_file(form.product_picture.data)
+        # Handle file upload (chunked uploads arrive as an already-stored URL)
+        try:
+            if form.uploaded_picture.data:
+                item.product_picture = form.uploaded_picture.data
+            elif form.product_picture.data and form.product_picture.data.filename:
+                item.product_picture = save_file(form.product_picture.data)
+        except UploadError as e:
+            flash(str(e), "danger")
+            return render_template('update_item.html', form=form, item=item)
 
         try:
             db.session.commit()
+            invalidation_bus.publish('product', item.id)
             flash(f"{item.product_name} updated successfully", "success")
             return redirect(url_for('admin.shop_items'))
         except Exception as e:
@@ -167,6 +220,8 @@ def delete_product(product_id):
         # Delete the product
         db.session.delete(product)
         db.session.commit()
+        invalidation_bus.publish('product', product_id)
+        invalidation_bus.publish('cart')
 
         flash("Product deleted successfully. Related cart items removed.", "success")
 
@@ -191,6 +246,7 @@ def delete_item(cart_id):
 
         db.session.delete(cart_item)
         db.session.commit()
+        invalidation_bus.publish('cart', cart_item.customer_link)
         flash('Item removed from cart.', 'success')
 
     except Exception as e:
@@ -200,10 +256,26 @@ def delete_item(cart_id):
 
     return redirect(url_for('views.shop_items'))
 
+@admin.route('/low-stock')
+@login_required
+def low_stock():
+    """Products below LOW_STOCK_THRESHOLD, from the catalog's maintained set."""
+    if admin_required():
+        return admin_required()
+
+    return jsonify({
+        'threshold': catalog.low_stock_threshold,
+        'items': [
+            {'id': row.id, 'product_name': row.product_name, 'in_stock': row.in_stock}
+            for row in catalog.low_stock()
+        ]
+    })
+
 # ---------------- Order Management ---------------- #
 
 @admin.route('/view-orders')
 @login_required
+@read_only
 def order_view():
     if admin_required():
         return admin_required()
@@ -237,6 +309,7 @@ def update_order(order_id):
 
 @admin.route('/customers')
 @login_required
+@read_only
 def display_customers():
     check = admin_required()
     if check:
@@ -264,11 +337,14 @@ def delete_customer(id):
 
         # DELETE ORDERS
         Order.query.filter_by(customer_link=id).delete()
+        OrderArchive.query.filter_by(customer_link=id).delete()
 
         # DELETE CUSTOMER
         db.session.delete(customer)
 
         db.session.commit()
+        invalidation_bus.publish('customer', id)
+        invalidation_bus.publish('cart', id)
         flash("Customer deleted successfully!", "success")
 
     except Exception as e:
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, update, delete, func
+from .models import Order, OrderArchive, Cart, InventoryLedger
+from .extensions import db, invalidation_bus
+
+CLOSED_STATUSES = ('Received', 'Delivered', 'Canceled')
+
+ARCHIVED_COLUMNS = [
+    'quantity', 'price', 'status', 'payment_id', 'product_name', 'product_picture',
+    'date_added', 'date_updated', 'customer_link', 'product_link',
+]
+
+
+def archive_orders(days=90, batch_size=500) -> int:
+    """
+    Move closed orders last updated more than `days` ago into order_archive.
+
+    Works in batches of `batch_size`, committing each one, so the write
+    lock is never held for long. Only orders whose archive row was written
+    in the same batch are deleted, after their inventory_ledger rows are
+    pointed at the archive row. Returns the number of orders moved.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = 0
+
+    while True:
+        ids = db.session.execute(
+            select(Order.id)
+            .where(Order.status.in_(CLOSED_STATUSES), Order.date_updated < cutoff)
+            .order_by(Order.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+
+        # archive-orders is the only writer of order_archive, so the rows
+        # above the current max id are exactly this batch's
+        floor = db.session.execute(select(func.max(OrderArchive.id))).scalar() or 0
+        source = select(Order.id, *[getattr(Order, c) for c in ARCHIVED_COLUMNS]).where(Order.id.in_(ids))
+        try:
+            db.session.execute(
+                insert(OrderArchive).from_select(['order_id', *ARCHIVED_COLUMNS], source)
+            )
+            archived = db.session.execute(
+                select(OrderArchive.order_id).where(OrderArchive.id > floor)
+            ).scalars().all()
+            db.session.execute(
+                update(InventoryLedger)
+                .where(InventoryLedger.order_link.in_(archived))
+                .values(archive_link=select(OrderArchive.id)
+                        .where(OrderArchive.order_id == InventoryLedger.order_link, OrderArchive.id > floor)
+                        .scalar_subquery()),
+                execution_options={'synchronize_session': False},
+            )
+            db.session.execute(delete(Order).where(Order.id.in_(archived)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if not archived:
+            return moved
+        moved += len(archived)
+
+
+def expire_carts(days=30, batch_size=500) -> int:
+    """Delete cart lines untouched for `days`; returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    removed = 0
+
+    while True:
+        ids = db.session.execute(
+            select(Cart.id).where(Cart.date_updated < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            if removed:
+                invalidation_bus.publish('cart')
+            return removed
+
+        db.session.execute(delete(Cart).where(Cart.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
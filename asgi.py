@@ -0,0 +1,10 @@
+from a2wsgi import WSGIMiddleware
+from website import create_app
+import os
+
+
+# ASGI entry point: `gunicorn -k uvicorn.workers.UvicornWorker asgi:app`
+# The event loop holds slow clients and keep-alive connections; each Flask
+# request then runs on a pool of ASGI_THREADS threads per worker, so that
+# many requests are handled concurrently.
+app = WSGIMiddleware(create_app(), workers=int(os.environ.get('ASGI_THREADS', 10)))
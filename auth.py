@@ -2,12 +2,21 @@ from flask import Blueprint, render_template, flash, redirect, request, url_for
 from flask_login import login_user, login_required, logout_user, current_user
 from .forms import LoginForm, SignUpForm, PasswordChangeForm
 from .models import Customer
-from .extensions import db
+from .extensions import db, auth_limiter, invalidation_bus
+from . import guest_cart
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 
 auth = Blueprint('auth', __name__)
 
+
+def rate_limited(email):
+    """Take a token from the IP and email buckets; True if either is empty."""
+    ip_ok = auth_limiter.consume(f'ip:{request.remote_addr}')
+    email_ok = auth_limiter.consume(f'email:{(email or "").strip().lower()}')
+    return not (ip_ok and email_ok)
+
+
 @auth.route('/sign-up', methods=['GET', 'POST'])
 def sign_up():
     form = SignUpForm()
@@ -19,6 +28,10 @@ def sign_up():
         password1 = form.password1.data
         password2 = form.password2.data
 
+        if rate_limited(email):
+            flash('Too many attempts. Please wait a moment and try again.')
+            return render_template('signup.html', form=form), 429
+
         if password1 != password2:
             flash('Passwords do not match!')
             return render_template('signup.html', form=form)
@@ -55,10 +68,20 @@ def login():
     if form.validate_on_submit():
         email = form.email.data
         password = form.password.data
+
+        if rate_limited(email):
+            flash('Too many login attempts. Please wait a moment and try again.')
+            return render_template('login.html', form=form), 429
+
         customer = Customer.query.filter_by(email=email).first()
 
         if customer and customer.verify_password(password):
+            # Upgrade hashes made under an older policy while we have the plaintext
+            if customer.needs_rehash():
+                customer.set_password(password)
+                db.session.commit()
             login_user(customer)
+            guest_cart.merge_into(customer.id)
             return redirect('/')
         flash('Incorrect Email or Password' if customer else 'Account does not exist.')
 
@@ -96,6 +119,7 @@ def change_password(customer_id):
             if form.new_password.data == form.confirm_new_password.data:
                 customer.set_password(form.new_password.data)  # securely hash the new password
                 db.session.commit()
+                invalidation_bus.publish('customer', customer.id)
                 flash('Password Updated Successfully')
                 return redirect(url_for('auth.profile', customer_id=customer.id))
             else:
@@ -125,6 +149,7 @@ def update_profile(customer_id):
         customer.date_of_birth = datetime.strptime(dob_str, "%Y-%m-%d").date() if dob_str else None
         
         db.session.commit()
+        invalidation_bus.publish('customer', customer.id)
         flash("Profile updated successfully!", "success")
 
         return redirect(url_for('auth.profile', customer_id=customer.id))
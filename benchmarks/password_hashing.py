@@ -0,0 +1,50 @@
+"""
+Concurrent login throughput with inline vs. process-pool password hashing.
+
+    python -m website.benchmarks.password_hashing [threads] [logins] [workers]
+
+Simulates a threaded worker where `threads` requests verify passwords at the
+same time, and reports verified logins per second for both modes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from werkzeug.security import generate_password_hash, check_password_hash
+from website.hashing import PasswordHasher
+import os
+import sys
+import time
+
+
+def run(hasher, stored, threads, logins):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(
+            lambda _: hasher.run(check_password_hash, stored, 'secret123'),
+            range(logins)
+        ))
+    assert all(results)
+    return logins / (time.perf_counter() - start)
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 2)
+
+    stored = generate_password_hash('secret123', method='pbkdf2:sha256:600000')
+
+    app = Flask(__name__)
+    inline = PasswordHasher(app)
+
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    pooled = PasswordHasher(app)
+    pooled.run(check_password_hash, stored, 'warm-up')  # start the workers
+
+    print(f"{threads} threads, {logins} logins, pool of {workers}")
+    print(f"inline:       {run(inline, stored, threads, logins):7.1f} logins/s")
+    print(f"process pool: {run(pooled, stored, threads, logins):7.1f} logins/s")
+    pooled.shutdown()
+
+
+if __name__ == '__main__':
+    main()
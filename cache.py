@@ -0,0 +1,39 @@
+from threading import Lock
+import time
+
+
+class TTLCache:
+    """Small thread-safe in-process cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl=30, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._data, key=lambda k: self._data[k][0])
+                del self._data[oldest]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,128 @@
+from collections import namedtuple
+from threading import RLock
+from .models import Product
+from .extensions import db
+import time
+
+# Everything the storefront listings render, with discount and stock flags
+# precomputed. Rows are plain tuples, so listing pages never build ORM
+# entities or touch the identity map.
+ListingRow = namedtuple('ListingRow', [
+    'id', 'product_name', 'current_price', 'previous_price', 'in_stock',
+    'flash_sale', 'product_picture', 'category_id', 'discount', 'available',
+])
+
+LISTING_COLUMNS = (
+    Product.id, Product.product_name, Product.current_price, Product.previous_price,
+    Product.in_stock, Product.flash_sale, Product.product_picture, Product.category_id,
+)
+
+
+def to_row(id, product_name, current_price, previous_price, in_stock,
+           flash_sale, product_picture, category_id) -> ListingRow:
+    discount = 0
+    if previous_price and current_price is not None and previous_price > current_price:
+        discount = round((previous_price - current_price) / previous_price * 100)
+    in_stock = in_stock or 0
+    return ListingRow(id, product_name, current_price, previous_price, in_stock,
+                      bool(flash_sale), product_picture, category_id,
+                      discount, in_stock > 0)
+
+
+class ProductCatalog:
+    """
+    In-process read model of the product listings.
+
+    Loaded with one column-only query, then kept current by refresh() calls
+    from 'product' events on the invalidation bus. A full rebuild also
+    happens after `ttl` seconds in case an event from another worker was lost.
+    """
+
+    def __init__(self, ttl=60, low_stock_threshold=5):
+        self.ttl = ttl
+        self.low_stock_threshold = low_stock_threshold
+        self._rows = {}          # id -> ListingRow, in id order
+        self._by_category = {}   # category_id -> {id: ListingRow}
+        self._low_stock = {}     # id -> ListingRow with in_stock below the threshold
+        self._loaded_at = None
+        self._lock = RLock()
+
+    # ---------------- Maintenance ---------------- #
+
+    def rebuild(self):
+        rows = [to_row(*r) for r in db.session.query(*LISTING_COLUMNS).order_by(Product.id)]
+        with self._lock:
+            self._rows = {}
+            self._by_category = {}
+            self._low_stock = {}
+            for row in rows:
+                self._put(row)
+            self._loaded_at = time.monotonic()
+
+    def refresh(self, product_id):
+        """Re-read one product after it was added or changed."""
+        if self._loaded_at is None:
+            return
+        result = db.session.query(*LISTING_COLUMNS).filter(Product.id == product_id).first()
+        with self._lock:
+            self._drop(product_id)
+            if result is not None:
+                self._put(to_row(*result))
+
+    def remove(self, product_id):
+        with self._lock:
+            self._drop(product_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _put(self, row):
+        self._rows[row.id] = row
+        self._by_category.setdefault(row.category_id, {})[row.id] = row
+        if row.in_stock < self.low_stock_threshold:
+            self._low_stock[row.id] = row
+
+    def _drop(self, product_id):
+        old = self._rows.pop(product_id, None)
+        if old is not None:
+            self._by_category.get(old.category_id, {}).pop(product_id, None)
+            self._low_stock.pop(product_id, None)
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.rebuild()
+
+    # ---------------- Reads ---------------- #
+
+    def all(self) -> list:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._rows.values())
+
+    def get(self, product_id):
+        self._ensure_loaded()
+        with self._lock:
+            return self._rows.get(product_id)
+
+    def by_category(self, category_id) -> list:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._by_category.get(category_id, {}).values())
+
+    def flash_sale(self, category_id=None) -> list:
+        rows = self.by_category(category_id) if category_id else self.all()
+        return [row for row in rows if row.flash_sale]
+
+    def low_stock(self) -> list:
+        """Products below the threshold, lowest stock first; O(k) in the result size."""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._low_stock.values(), key=lambda row: row.in_stock)
+
+    def search(self, term) -> list:
+        term = (term or '').lower()
+        return [row for row in self.all() if term in (row.product_name or '').lower()]
+
+
+catalog = ProductCatalog()
@@ -0,0 +1,60 @@
+from collections import namedtuple
+from threading import Lock
+from .models import Category
+
+CategoryInfo = namedtuple('CategoryInfo', ['id', 'slug', 'name', 'template'])
+
+
+class CategoryRegistry:
+    """
+    Cached copy of the Category table, looked up by id, slug or name.
+
+    Categories only change through migrations or the shell, so the registry
+    loads once per process; call invalidate() after editing the table.
+    """
+
+    def __init__(self):
+        self._maps = None    # (by_id, by_slug, by_name), swapped in as one value
+        self._lock = Lock()
+
+    def _loaded(self) -> tuple:
+        maps = self._maps
+        if maps is not None:
+            return maps
+        with self._lock:
+            if self._maps is None:
+                rows = Category.query.with_entities(
+                    Category.id, Category.slug, Category.name, Category.template
+                ).order_by(Category.position, Category.id).all()
+                by_id = {row.id: CategoryInfo(*row) for row in rows}
+                by_slug = {c.slug: c for c in by_id.values()}
+                by_name = {c.name: c for c in by_id.values()}
+                self._maps = (by_id, by_slug, by_name)
+            return self._maps
+
+    def invalidate(self):
+        with self._lock:
+            self._maps = None
+
+    def all(self) -> list:
+        by_id, _, _ = self._loaded()
+        return list(by_id.values())
+
+    def get(self, category_id):
+        by_id, _, _ = self._loaded()
+        return by_id.get(category_id)
+
+    def lookup(self, key):
+        """Find a category by slug or by display name."""
+        _, by_slug, by_name = self._loaded()
+        return by_slug.get(key) or by_name.get(key)
+
+    def choices(self) -> list:
+        return [(c.id, c.name) for c in self.all()]
+
+    def with_counts(self, catalog) -> list:
+        """(CategoryInfo, product count) pairs, counted from the listing read model."""
+        return [(c, len(catalog.by_category(c.id))) for c in self.all()]
+
+
+category_registry = CategoryRegistry()
@@ -0,0 +1,60 @@
+from flask import current_app
+from sqlalchemy.orm import contains_eager
+from itsdangerous import URLSafeTimedSerializer, BadData
+from .models import Cart
+
+# place_order signs the reviewed lines into a short-lived quote that the
+# review form posts back, so confirm_order validates them with a single
+# query instead of rebuilding the review from scratch.
+
+QUOTE_SALT = 'checkout-quote'
+
+
+def serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt=QUOTE_SALT)
+
+
+def make_quote(customer_id, cart_items) -> str:
+    """Sign [cart_id, product_id, quantity, unit_price] for each reviewed line."""
+    lines = [[c.id, c.product.id, c.quantity, c.product.current_price] for c in cart_items]
+    return serializer().dumps({'c': customer_id, 'l': lines})
+
+
+def load_quote(token, customer_id):
+    """The quoted lines, or None when the quote is forged, expired or not this customer's."""
+    try:
+        data = serializer().loads(token, max_age=current_app.config.get('CHECKOUT_QUOTE_TTL', 900))
+    except BadData:
+        return None
+    if data.get('c') != customer_id:
+        return None
+    return data.get('l') or None
+
+
+class QuoteMismatch(Exception):
+    """The cart, prices or stock changed since the quote was issued."""
+
+
+def validate_quote(lines, customer_id) -> list:
+    """
+    Check the quoted lines against the database in one query.
+
+    Returns the Cart rows (their products loaded alongside) ready for
+    ordering, or raises QuoteMismatch describing what changed.
+    """
+    rows = Cart.query.join(Cart.product).options(contains_eager(Cart.product)).filter(
+        Cart.id.in_([line[0] for line in lines]),
+        Cart.customer_link == customer_id
+    ).all()
+    current = {cart.id: (cart, cart.product) for cart in rows}
+
+    for cart_id, product_id, quantity, price in lines:
+        cart, product = current.get(cart_id, (None, None))
+        if cart is None or product.id != product_id or cart.quantity != quantity:
+            raise QuoteMismatch("Your cart changed since you reviewed your order.")
+        if product.current_price != price:
+            raise QuoteMismatch(f"The price of {product.product_name} changed to Php {product.current_price}.")
+        if product.in_stock < quantity:
+            raise QuoteMismatch(f"Only {product.in_stock} {product.product_name} left in stock.")
+
+    return rows
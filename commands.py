@@ -0,0 +1,119 @@
+from flask.cli import with_appcontext
+import click
+
+
+def init_db():
+    """Create missing tables, then apply additive migrations and backfills."""
+    from .extensions import db
+    from .schema import upgrade_schema
+
+    db.create_all()
+    upgrade_schema()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database schema."""
+    init_db()
+    click.echo("Database schema is up to date.")
+
+
+@click.command('reconcile-stock')
+@with_appcontext
+def reconcile_stock_command():
+    """Rebuild Product.in_stock from the inventory ledger."""
+    from .inventory import reconcile_stock
+    from .extensions import invalidation_bus
+
+    changed = reconcile_stock()
+    invalidation_bus.publish('product')
+    click.echo(f"Reconciled stock: {changed} product(s) corrected.")
+
+
+# Schedule with cron, e.g. nightly maintenance and hourly backups:
+#   0 3 * * *  cd /app && flask --app main db-maintenance
+#   0 * * * *  cd /app && flask --app main db-backup
+#   30 3 * * * cd /app && flask --app main archive-orders --days 90 --cart-days 30
+
+@click.command('db-maintenance')
+@click.option('--vacuum-pages', default=1000, show_default=True, help='Pages to free per run.')
+@click.option('--enable-incremental', is_flag=True, help='Switch to auto_vacuum=INCREMENTAL (runs one full VACUUM).')
+@with_appcontext
+def db_maintenance_command(vacuum_pages, enable_incremental):
+    """ANALYZE, PRAGMA optimize, incremental vacuum and WAL checkpoint."""
+    from .extensions import db
+    from .maintenance import database_path, run_maintenance, enable_incremental_vacuum
+
+    path = database_path(db.engine)
+    if enable_incremental:
+        enable_incremental_vacuum(path)
+
+    stats = run_maintenance(path, vacuum_pages)
+    click.echo(f"size: {stats['size_before']} -> {stats['size_after']} bytes, "
+               f"free pages: {stats['freelist_before']} -> {stats['freelist_after']}")
+    for step in ('analyze', 'optimize', 'incremental_vacuum', 'wal_checkpoint'):
+        click.echo(f"  {step:<20} {stats[step + '_ms']:8.1f} ms")
+    if stats['auto_vacuum'] != 2:
+        click.echo("note: auto_vacuum is not INCREMENTAL; run once with --enable-incremental")
+
+
+@click.command('db-backup')
+@click.argument('dest', required=False)
+@click.option('--pages', default=100, show_default=True, help='Pages copied per step.')
+@with_appcontext
+def db_backup_command(dest, pages):
+    """Online backup of the database (default: instance/backups/)."""
+    from .extensions import db
+    from .maintenance import database_path, backup
+
+    stats = backup(database_path(db.engine), dest, pages=pages)
+    click.echo(f"backup: {stats['dest']} ({stats['size']} bytes, {stats['pages']} pages, "
+               f"{stats['steps']} steps, {stats['elapsed_ms']:.1f} ms)")
+
+
+@click.command('archive-orders')
+@click.option('--days', default=90, show_default=True, help='Archive closed orders older than this.')
+@click.option('--cart-days', default=30, show_default=True, help='Expire cart lines untouched this long.')
+@click.option('--upload-hours', default=24, show_default=True, help='Delete partial uploads untouched this long.')
+@click.option('--batch-size', default=500, show_default=True)
+@with_appcontext
+def archive_orders_command(days, cart_days, upload_hours, batch_size):
+    """Move old closed orders to order_archive and expire stale carts and uploads."""
+    from .archive import archive_orders, expire_carts
+    from .uploads import expire_partial_uploads
+
+    click.echo(f"Archived {archive_orders(days, batch_size)} order(s).")
+    click.echo(f"Expired {expire_carts(cart_days, batch_size)} cart line(s).")
+    click.echo(f"Expired {expire_partial_uploads(upload_hours)} partial upload(s).")
+
+
+@click.command('warm-templates')
+@with_appcontext
+def warm_templates_command():
+    """Precompile all templates into the Jinja bytecode cache."""
+    from flask import current_app
+    from .templating import warm_templates
+
+    click.echo(f"Compiled {warm_templates(current_app)} template(s).")
+
+
+@click.command('build-recommendations')
+@click.option('--top-k', default=10, show_default=True, help='Neighbours kept per product.')
+@click.option('--full', is_flag=True, help='Recompute every product, not just those with new purchases.')
+@with_appcontext
+def build_recommendations_command(top_k, full):
+    """Rebuild "customers also bought" neighbours from orders and carts."""
+    from .recommendations import build_recommendations
+
+    click.echo(f"Refreshed neighbours for {build_recommendations(top_k, full)} product(s).")
+
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(reconcile_stock_command)
+    app.cli.add_command(db_maintenance_command)
+    app.cli.add_command(db_backup_command)
+    app.cli.add_command(archive_orders_command)
+    app.cli.add_command(warm_templates_command)
+    app.cli.add_command(build_recommendations_command)
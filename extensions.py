@@ -1,8 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from .cache import TTLCache
+from .ratelimit import TokenBucketLimiter
+from .hashing import PasswordHasher
+from .routing import RoutingSession
+from .invalidation import InvalidationBus
 
-db = SQLAlchemy()
+# RoutingSession lets read-only views query the read engine (see routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Slim Customer snapshots used by the login manager's user_loader
+identity_cache = TTLCache(ttl=30)
+
+# Cart line counts for the navbar badge, keyed by customer id
+cart_counts = TTLCache(ttl=30)
+
+# Publishes product/customer/cart changes so every worker drops stale entries
+invalidation_bus = InvalidationBus()
+
+# Throttles /login and /sign-up per IP and per email before any hashing
+auth_limiter = TokenBucketLimiter()
+
+# Optional process pool for Customer.set_password / verify_password
+password_hasher = PasswordHasher()
 
 @event.listens_for(Engine, "connect")
 def enable_foreign_keys(dbapi_connection, connection_record):
@@ -1,9 +1,9 @@
 from flask_wtf import FlaskForm
 from wtforms import (
     StringField, IntegerField, FloatField, PasswordField,
-    EmailField, BooleanField, SubmitField, SelectField
+    EmailField, BooleanField, SubmitField, SelectField, HiddenField
 )
-from wtforms.validators import DataRequired, Length, NumberRange
+from wtforms.validators import DataRequired, Length, NumberRange, Optional, Regexp
 from flask_wtf.file import FileField
 from wtforms import SubmitField
 
@@ -41,22 +41,14 @@ class ShopItemsForm(FlaskForm):
     # Your first code used StringField, second used IntegerField → unified as IntegerField
     in_stock = IntegerField('Stock Quantity', validators=[DataRequired(), NumberRange(min=0)])
 
-    product_picture = FileField('Product Picture', validators=[DataRequired()])
+    # Not DataRequired: large images are sent through /upload-chunk first and
+    # arrive here as `uploaded_picture`; the views check that one is present.
+    product_picture = FileField('Product Picture')
+    uploaded_picture = HiddenField(validators=[Optional(), Regexp(r'^/media/[\w.-]+$')])
     flash_sale = BooleanField('Flash Sale')
 
-    # Category field from second code block
-    category = SelectField(
-        'Category',
-        choices=[
-            ('Phone', 'Phone'),
-            ('Accessories', 'Accessories'),
-            ('Watch', 'Watch'),
-            ('Laptop', 'Laptop'),
-            ('Gaming', 'Gaming'),
-            ('Television', 'Television'),
-        ],
-        validators=[DataRequired()]
-    )
+    # Choices come from the Category table (see admin views)
+    category = SelectField('Category', coerce=int, validators=[DataRequired()])
 
     # Keeping all submit buttons
     add_product = SubmitField('Add Product')
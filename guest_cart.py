@@ -0,0 +1,121 @@
+from collections import namedtuple
+from flask import session, current_app
+from .models import Product, Cart
+from .extensions import db, invalidation_bus
+import time
+
+# Anonymous visitors keep their cart in the signed session cookie as
+# {"t": last_touched, "i": {"<product_id>": quantity}}, so browsing never
+# writes to the shared database. It is merged into Cart rows on login.
+
+SESSION_KEY = 'guest_cart'
+MAX_LINES = 50  # keeps the cookie well under the 4 KB browser limit
+
+# Duck-types the bits of Cart that cart.html uses; ids are prefixed with
+# "g" so the cart endpoints can tell guest lines from Cart rows.
+GuestCartItem = namedtuple('GuestCartItem', ['id', 'product', 'quantity'])
+
+
+def is_guest_id(cart_id) -> bool:
+    return str(cart_id or '').startswith('g')
+
+
+def product_id_from(cart_id):
+    """Product id from a guest cart id, or None if it isn't "g<digits>"."""
+    digits = str(cart_id)[1:]
+    return int(digits) if digits.isdigit() else None
+
+
+def load() -> dict:
+    data = session.get(SESSION_KEY)
+    if not data:
+        return {}
+    if data.get('t', 0) + current_app.config.get('GUEST_CART_TTL', 7 * 86400) < time.time():
+        session.pop(SESSION_KEY, None)
+        return {}
+    return {int(pid): qty for pid, qty in data.get('i', {}).items()}
+
+
+def store(items: dict) -> None:
+    items = {pid: qty for pid, qty in items.items() if qty > 0}
+    if items:
+        session[SESSION_KEY] = {'t': int(time.time()), 'i': {str(pid): qty for pid, qty in items.items()}}
+    else:
+        session.pop(SESSION_KEY, None)
+
+
+def count() -> int:
+    return len(load())
+
+
+def set_quantity(product_id: int, quantity: int) -> bool:
+    """False when a new line doesn't fit because the cart already has MAX_LINES."""
+    items = load()
+    if quantity <= 0:
+        items.pop(product_id, None)
+    elif product_id in items or len(items) < MAX_LINES:
+        items[product_id] = quantity
+    else:
+        return False
+    store(items)
+    return True
+
+
+def lines() -> list:
+    """GuestCartItems for the cart page, dropping products that no longer exist."""
+    items = load()
+    if not items:
+        return []
+    products = Product.query.filter(Product.id.in_(items.keys())).all()
+    return [GuestCartItem(f'g{p.id}', p, items[p.id]) for p in products]
+
+
+def total() -> float:
+    return sum(item.product.current_price * item.quantity for item in lines())
+
+
+def merge_into(customer_id: int) -> None:
+    """
+    Move the guest cart into the customer's Cart rows in one transaction:
+    one SELECT for existing lines and products, then a single flush of
+    updates and inserts. Quantities are capped at the current stock.
+    """
+    items = load()
+    if not items:
+        return
+
+    stock = dict(
+        db.session.query(Product.id, Product.in_stock)
+        .filter(Product.id.in_(items.keys())).all()
+    )
+    existing = {
+        c.product_link: c for c in
+        Cart.query.filter(Cart.customer_link == customer_id,
+                          Cart.product_link.in_(items.keys())).all()
+    }
+
+    new_rows = []
+    for product_id, quantity in items.items():
+        # Gone or out of stock: leave any existing line as it was
+        if stock.get(product_id, 0) <= 0:
+            continue
+        if product_id in existing:
+            row = existing[product_id]
+            row.quantity = min(row.quantity + quantity, stock[product_id])
+        else:
+            new_rows.append({
+                'quantity': min(quantity, stock[product_id]),
+                'product_link': product_id,
+                'customer_link': customer_id,
+            })
+
+    try:
+        if new_rows:
+            db.session.execute(db.insert(Cart), new_rows)
+        db.session.commit()
+        invalidation_bus.publish('cart', customer_id)
+        session.pop(SESSION_KEY, None)
+    except Exception as e:
+        # Keep the guest cart so nothing is lost; the login itself still succeeds
+        db.session.rollback()
+        print("Guest cart merge failed:", e)
@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+# Gunicorn picks this file up automatically from the working directory.
+# Every setting can be overridden through the environment, e.g.
+#
+#   sync (default):  gunicorn main:app
+#   threaded:        GUNICORN_WORKER_CLASS=gthread GUNICORN_THREADS=8 gunicorn main:app
+#   ASGI / async:    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn asgi:app
+#
+# Sync workers serve one request each. gthread runs GUNICORN_THREADS
+# requests per worker and keeps idle keep-alive connections out of the
+# thread pool. The uvicorn worker holds thousands of connections on its
+# event loop (capped by worker_connections) and hands each request to
+# asgi.py's thread pool (ASGI_THREADS). Either of the last two works for
+# many keep-alive connections per box; gthread needs no ASGI adapter.
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:80')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# Workers share no memory, so cache invalidations have to reach the others.
+# Defaults to UNIX sockets on this box; set sqlite or redis (see
+# invalidation.py) when workers span several hosts.
+if workers > 1:
+    os.environ.setdefault('INVALIDATION_TRANSPORT', 'socket')
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore
+import multiprocessing
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a bounded process pool.
+
+    With PASSWORD_HASH_WORKERS = 0 (the default) everything runs inline.
+    When the pool is saturated, times out or breaks, the call falls back to
+    hashing inline so a login never fails because of the pool.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._slots = None
+        self.timeout = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.setdefault('PASSWORD_HASH_WORKERS', 0)
+        self.timeout = app.config.setdefault('PASSWORD_HASH_TIMEOUT', 5)
+        app.extensions['password_hasher'] = self
+
+        self.shutdown()
+        if workers:
+            # spawn: forking a threaded server process can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            # Bound the backlog so a burst queues in the request threads
+            # instead of growing the executor's unbounded work queue
+            self._slots = BoundedSemaphore(workers * 2)
+
+    def run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+
+        slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            return func(*args)
+        try:
+            future = self._executor.submit(func, *args)
+        except (BrokenProcessPool, OSError, RuntimeError):
+            slots.release()
+            return func(*args)
+
+        # The slot is held until the job really finishes (or is cancelled),
+        # not just until this call stops waiting for it
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Still queued: drop it so the hash isn't computed twice
+            future.cancel()
+            return func(*args)
+        except (BrokenProcessPool, OSError):
+            return func(*args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
@@ -0,0 +1,267 @@
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+import json
+import os
+import socket
+import time
+
+
+def encode(message) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode()
+
+
+def drain(inbox) -> list:
+    messages = []
+    while True:
+        try:
+            messages.append(json.loads(inbox.popleft()))
+        except IndexError:
+            return messages
+
+
+class LocalTransport:
+    """Single process: events only reach this worker's own caches."""
+
+    shared = False
+
+    def send(self, message):
+        pass
+
+    def receive(self) -> list:
+        return []
+
+
+class SocketTransport:
+    """
+    Datagrams over UNIX sockets, one per worker in `directory` (same host).
+
+    Each worker binds `<pid>.sock` on first use, after the fork, and a
+    daemon thread queues what arrives until the next poll. Sockets whose
+    worker has exited are removed when a send to them is refused.
+    """
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._pid = None
+        self._path = None
+        self._inbox = deque()
+        self._lock = Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{os.getpid()}.sock')
+            if os.path.exists(path):
+                os.unlink(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            self._inbox = deque()
+            Thread(target=self._listen, args=(sock, self._inbox), daemon=True).start()
+            self._path, self._pid = path, os.getpid()
+
+    @staticmethod
+    def _listen(sock, inbox):
+        while True:
+            try:
+                inbox.append(sock.recv(65536))
+            except OSError:
+                return
+
+    def send(self, message):
+        self._ensure_started()
+        data = encode(message)
+        out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        out.setblocking(False)
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if path == self._path or not name.endswith('.sock'):
+                    continue
+                try:
+                    out.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Receiver's buffer is full; its cache TTLs still apply
+                    pass
+        finally:
+            out.close()
+
+    def receive(self) -> list:
+        self._ensure_started()
+        return drain(self._inbox)
+
+
+class SQLiteTransport:
+    """
+    Rows in the invalidation_event table, read by id at most every
+    `interval` seconds. Works for every process sharing the database,
+    including CLI commands. Rows older than `retention` seconds are pruned.
+    """
+
+    shared = True
+
+    def __init__(self, interval=1.0, retention=3600):
+        self.interval = interval
+        self.retention = retention
+        self._last_id = None
+        self._polled_at = 0.0
+        self._pruned_at = 0.0
+        self._lock = Lock()
+
+    def send(self, message):
+        from .extensions import db
+        from .models import InvalidationEvent
+
+        table = InvalidationEvent.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.insert().values(**message, date_added=datetime.utcnow()))
+            if time.monotonic() - self._pruned_at > self.retention / 10:
+                cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+                conn.execute(table.delete().where(table.c.date_added < cutoff))
+                self._pruned_at = time.monotonic()
+
+    def receive(self) -> list:
+        from .extensions import db
+        from .models import InvalidationEvent
+
+        if time.monotonic() - self._polled_at < self.interval or not self._lock.acquire(blocking=False):
+            return []
+        try:
+            self._polled_at = time.monotonic()
+            table = InvalidationEvent.__table__
+            with db.engine.connect() as conn:
+                if self._last_id is None:
+                    # Nothing is cached before the first poll, so skip the backlog
+                    self._last_id = conn.execute(db.select(db.func.max(table.c.id))).scalar() or 0
+                    return []
+                rows = conn.execute(
+                    db.select(table.c.id, table.c.origin, table.c.topic, table.c.item_id)
+                    .where(table.c.id > self._last_id).order_by(table.c.id)
+                ).all()
+            if rows:
+                self._last_id = rows[-1].id
+            return [{'origin': r.origin, 'topic': r.topic, 'item_id': r.item_id} for r in rows]
+        finally:
+            self._lock.release()
+
+
+class RedisTransport:
+    """Pub/sub on a Redis broker, for workers on several hosts. Needs `pip install redis`."""
+
+    shared = True
+
+    def __init__(self, url, channel='invalidation'):
+        self.url = url
+        self.channel = channel
+        self._pid = None
+        self._client = None
+        self._inbox = deque()
+        self._lock = Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            import redis
+            client = redis.Redis.from_url(self.url)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            self._inbox = deque()
+            Thread(target=self._listen, args=(pubsub, self._inbox), daemon=True).start()
+            self._client, self._pid = client, os.getpid()
+
+    @staticmethod
+    def _listen(pubsub, inbox):
+        for message in pubsub.listen():
+            inbox.append(message['data'])
+
+    def send(self, message):
+        self._ensure_started()
+        self._client.publish(self.channel, encode(message))
+
+    def receive(self) -> list:
+        self._ensure_started()
+        return drain(self._inbox)
+
+
+class InvalidationBus:
+    """
+    Fans cache invalidations out to every worker process.
+
+    Write paths call publish(topic, item_id) after committing: the
+    subscribed handlers run here straight away and the event goes to the
+    transport. Other workers pick it up in poll(), which runs before each
+    request, so handlers always run inside an app context.
+    """
+
+    def __init__(self):
+        self.transport = LocalTransport()
+        self._handlers = {}
+
+    def init_app(self, app):
+        kind = app.config.setdefault('INVALIDATION_TRANSPORT', 'local')
+        if kind == 'local':
+            self.transport = LocalTransport()
+        elif kind == 'socket':
+            self.transport = SocketTransport(app.config.setdefault(
+                'INVALIDATION_SOCKET_DIR', os.path.join(app.instance_path, 'invalidation')))
+        elif kind == 'sqlite':
+            self.transport = SQLiteTransport(app.config.setdefault('INVALIDATION_POLL_INTERVAL', 1.0))
+        elif kind == 'redis':
+            if not app.config.get('INVALIDATION_BROKER_URL'):
+                raise ValueError("INVALIDATION_TRANSPORT 'redis' needs INVALIDATION_BROKER_URL")
+            self.transport = RedisTransport(app.config['INVALIDATION_BROKER_URL'])
+        else:
+            raise ValueError(f"Unknown INVALIDATION_TRANSPORT {kind!r}")
+        app.before_request(self.poll)
+
+    @property
+    def shared(self) -> bool:
+        """True when events reach other workers, so caches can keep long TTLs."""
+        return self.transport.shared
+
+    @property
+    def origin(self) -> str:
+        # Per process, computed on use so forked workers don't share it
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def subscribe(self, topic, handler):
+        # Keyed by name, so a second create_app() replaces rather than adds
+        self._handlers.setdefault(topic, {})[handler.__qualname__] = handler
+
+    def publish(self, topic, item_id=None):
+        """Topic is 'product', 'customer' or 'cart'; item_id None means all of them."""
+        self._dispatch(topic, item_id)
+        try:
+            self.transport.send({'origin': self.origin, 'topic': topic, 'item_id': item_id})
+        except Exception as e:
+            # Other workers fall back to their cache TTLs
+            print("Invalidation publish failed:", e)
+
+    def poll(self):
+        try:
+            messages = self.transport.receive()
+        except Exception as e:
+            print("Invalidation poll failed:", e)
+            return
+        origin = self.origin
+        for message in messages:
+            if message['origin'] != origin:
+                self._dispatch(message['topic'], message['item_id'])
+
+    def _dispatch(self, topic, item_id):
+        for handler in self._handlers.get(topic, {}).values():
+            handler(item_id)
@@ -0,0 +1,45 @@
+from sqlalchemy import text
+from .models import InventoryLedger
+from .extensions import db
+
+
+def adjust_stock(product, delta, reason, order=None):
+    """
+    Change a product's stock and record it in the ledger.
+
+    Stock never goes below zero; the ledger gets the change actually applied.
+    Only adds to the session, so the caller's commit covers both writes.
+    """
+    new_stock = max(0, (product.in_stock or 0) + delta)
+    applied = new_stock - (product.in_stock or 0)
+    product.in_stock = new_stock
+
+    if applied:
+        db.session.add(InventoryLedger(product_link=product.id, delta=applied, reason=reason, order=order))
+    return applied
+
+
+def set_stock(product, quantity, reason='adjustment'):
+    return adjust_stock(product, quantity - (product.in_stock or 0), reason)
+
+
+def record_opening_balances(conn):
+    """Ledger rows for products whose stock predates the ledger."""
+    conn.execute(text(
+        "INSERT INTO inventory_ledger (delta, reason, date_added, product_link) "
+        "SELECT in_stock, 'opening', CURRENT_TIMESTAMP, id FROM product "
+        "WHERE in_stock > 0 AND id NOT IN "
+        "(SELECT product_link FROM inventory_ledger WHERE product_link IS NOT NULL)"
+    ))
+
+
+def reconcile_stock():
+    """Rebuild every product's in_stock from the ledger in one statement; returns rows changed."""
+    result = db.session.execute(text(
+        "UPDATE product SET in_stock = "
+        "(SELECT COALESCE(SUM(delta), 0) FROM inventory_ledger WHERE product_link = product.id) "
+        "WHERE in_stock IS NOT "
+        "(SELECT COALESCE(SUM(delta), 0) FROM inventory_ledger WHERE product_link = product.id)"
+    ))
+    db.session.commit()
+    return result.rowcount
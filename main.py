@@ -1,8 +1,12 @@
 from website import create_app
+from website.commands import init_db
 
 
 app = create_app()
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # The dev server upgrades the schema itself; deployments run `flask init-db`
+    with app.app_context():
+        init_db()
+    app.run(debug=True)
@@ -1,7 +1,8 @@
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-from .extensions import db   # <-- using your first version import
+from .extensions import db, password_hasher   # <-- using your first version import
 
 
 # ============================
@@ -26,16 +27,82 @@ class Customer(db.Model, UserMixin):
 
     # ------------------------ Password Helpers ------------------------ #
 
+    @staticmethod
+    def password_hash_method():
+        """Werkzeug method string for the configured hash policy."""
+        algorithm = current_app.config.get('PASSWORD_HASH_ALGORITHM', 'sha256')
+        iterations = current_app.config.get('PASSWORD_HASH_ITERATIONS', 600000)
+        return f'pbkdf2:{algorithm}:{iterations}'
+
     def set_password(self, password):
         """Hashes and sets the user's password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.run(
+            generate_password_hash, password, self.password_hash_method()
+        )
+
+    def needs_rehash(self):
+        """True when the stored hash was made with a different policy."""
+        if not self.password_hash:
+            return False
+        return self.password_hash.split('$', 1)[0] != self.password_hash_method()
 
     def verify_password(self, password):
         """Verifies a password. Returns False if no password is set."""
         if not self.password_hash:
             return False  # Prevent NoneType error
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.run(check_password_hash, self.password_hash, password)
     
+# ============================
+#      CUSTOMER SNAPSHOT
+# ============================
+class CustomerSnapshot:
+    """
+    Read-only copy of the Customer columns the request cycle needs.
+
+    Returned by the login manager's user_loader from the identity cache, so
+    authenticated page views don't SELECT the customer row on every request.
+    """
+    __slots__ = ('id', 'email', 'username', 'address', 'pnumber', 'sex',
+                 'date_of_birth', 'profile_picture')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_customer(cls, customer):
+        return cls(**{name: getattr(customer, name) for name in cls.__slots__})
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+# ============================
+#        CATEGORY MODEL
+# ============================
+class Category(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(50), unique=True, nullable=False)   # URL path, e.g. 'smart-watch'
+    name = db.Column(db.String(50), unique=True, nullable=False)   # value shown in forms, e.g. 'Watch'
+    template = db.Column(db.String(100))                          # listing template, falls back to category.html
+    position = db.Column(db.Integer, default=0)
+
+    products = db.relationship('Product', backref=db.backref('category_ref', lazy=True))
+
+    def __str__(self):
+        return f'<Category {self.slug}>'
+
+
 # ============================
 #         PRODUCT MODEL
 # ============================
@@ -46,7 +113,8 @@ class Product(db.Model):
     previous_price = db.Column(db.Float)  # merged: second version forced nullable=False, first allowed None
     in_stock = db.Column(db.Integer, default=0, nullable=False)  # best option: Integer + default
     flash_sale = db.Column(db.Boolean, default=False)
-    category = db.Column(db.String(50))  # from first version
+    category = db.Column(db.String(50))  # from first version; only read by the category_id backfill
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), index=True)
     product_picture = db.Column(db.String(1000))  # merged: 100 → 1000 (safer for long filenames)
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -63,6 +131,7 @@ class Product(db.Model):
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     quantity = db.Column(db.Integer, nullable=False)
+    date_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     customer_link = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
     product_link = db.Column(
@@ -71,6 +140,9 @@ class Cart(db.Model):
         nullable=True
     )
 
+    # AUTOINCREMENT: ids of deleted lines are never handed out again
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
     def __str__(self):
         return f'<Cart {self.id}>'
 
@@ -81,12 +153,128 @@ class Cart(db.Model):
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     quantity = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False)  # unit price at checkout
     status = db.Column(db.String(100), nullable=False)
     payment_id = db.Column(db.String(1000), nullable=False)
 
+    # Snapshot of the product at checkout, so order history renders without
+    # touching Product and survives the product being deleted
+    product_name = db.Column(db.String(100))
+    product_picture = db.Column(db.String(1000))
+
+    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    date_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     customer_link = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
-    product_link = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_link = db.Column(
+        db.Integer,
+        db.ForeignKey('product.id', ondelete='SET NULL'),
+        nullable=True
+    )
+
+    # Keyset pagination of a customer's history: WHERE customer_link = ? AND id < ?
+    # AUTOINCREMENT: an archived or deleted order's id is never reused
+    __table_args__ = (
+        db.Index('ix_order_customer_link_id', 'customer_link', 'id'),
+        {'sqlite_autoincrement': True},
+    )
 
     def __str__(self):
         return f'<Order {self.id}>'
+
+
+# ============================
+#        ORDER ARCHIVE
+# ============================
+class OrderArchive(db.Model):
+    """
+    Closed orders moved out of the hot Order table by `flask archive-orders`.
+    Same columns as Order, keeping the original id in order_id: SQLite can
+    hand that id to a new order once the row is gone, so it is not unique
+    here. No foreign keys, so archived rows never block product or customer
+    deletes.
+    """
+    __tablename__ = 'order_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(100), nullable=False)
+    payment_id = db.Column(db.String(1000), nullable=False)
+    product_name = db.Column(db.String(100))
+    product_picture = db.Column(db.String(1000))
+    date_added = db.Column(db.DateTime)
+    date_updated = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    customer_link = db.Column(db.Integer, nullable=False)
+    product_link = db.Column(db.Integer)
+
+    __table_args__ = (db.Index('ix_order_archive_customer_link_id', 'customer_link', 'id'),)
+
+    def __str__(self):
+        return f'<OrderArchive {self.id}>'
+
+
+# ============================
+#     PRODUCT RECOMMENDATIONS
+# ============================
+class ProductNeighbor(db.Model):
+    """Top-K co-purchase neighbours per product, built by `flask build-recommendations`."""
+    __tablename__ = 'product_neighbor'
+
+    # (product_link, rank) primary key: one index range scan per lookup
+    product_link = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    neighbor_link = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __str__(self):
+        return f'<ProductNeighbor {self.product_link} #{self.rank}>'
+
+
+# ============================
+#    CACHE INVALIDATION EVENTS
+# ============================
+class InvalidationEvent(db.Model):
+    """Outbox polled by workers when INVALIDATION_TRANSPORT is 'sqlite' (see invalidation.py)."""
+    __tablename__ = 'invalidation_event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    origin = db.Column(db.String(100), nullable=False)
+    topic = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, nullable=True)
+    date_added = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __str__(self):
+        return f'<InvalidationEvent {self.topic} {self.item_id}>'
+
+
+# ============================
+#      INVENTORY LEDGER
+# ============================
+class InventoryLedger(db.Model):
+    """Append-only history of stock changes; summing delta per product gives in_stock."""
+    __tablename__ = 'inventory_ledger'
+
+    id = db.Column(db.Integer, primary_key=True)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False)   # opening, restock, adjustment, order, cancel
+    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+
+    product_link = db.Column(
+        db.Integer,
+        db.ForeignKey('product.id', ondelete='SET NULL'),
+        nullable=True,
+        index=True
+    )
+    order_link = db.Column(db.Integer, db.ForeignKey('order.id', ondelete='SET NULL'), nullable=True)
+    # Set by archive-orders just before the order row (and so order_link) goes away
+    archive_link = db.Column(db.Integer, db.ForeignKey('order_archive.id'), nullable=True, index=True)
+
+    order = db.relationship('Order')
+
+    def __str__(self):
+        return f'<InventoryLedger {self.product_link} {self.delta:+d}>'
@@ -0,0 +1,44 @@
+from threading import Lock
+import time
+
+
+class TokenBucketLimiter:
+    """
+    In-process token bucket keyed by arbitrary strings (IP, email, ...).
+
+    Each key holds up to `capacity` tokens and regains `rate` tokens per
+    second; consume() returns False once a key's bucket is empty.
+    """
+
+    def __init__(self, capacity=10, rate=10 / 60, maxsize=100000):
+        self.capacity = capacity
+        self.rate = rate
+        self.maxsize = maxsize
+        self._buckets = {}
+        self._lock = Lock()
+
+    def consume(self, key, tokens=1):
+        now = time.monotonic()
+        with self._lock:
+            level, last = self._buckets.get(key, (self.capacity, now))
+            level = min(self.capacity, level + (now - last) * self.rate)
+
+            if level < tokens:
+                self._buckets[key] = (level, now)
+                return False
+
+            if len(self._buckets) >= self.maxsize and key not in self._buckets:
+                self._prune(now)
+            self._buckets[key] = (level - tokens, now)
+            return True
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [k for k, (level, last) in self._buckets.items()
+                if level + (now - last) * self.rate >= self.capacity]
+        for k in full:
+            del self._buckets[k]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
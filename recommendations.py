@@ -0,0 +1,96 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import select, union, delete, func, insert
+from .models import Order, OrderArchive, Cart, ProductNeighbor
+from .extensions import db
+import heapq
+import math
+
+
+def customer_baskets() -> dict:
+    """customer id -> set of product ids ordered (incl. archived) or in cart."""
+    rows = db.session.execute(union(
+        select(Order.customer_link, Order.product_link).where(Order.product_link.isnot(None)),
+        select(OrderArchive.customer_link, OrderArchive.product_link).where(OrderArchive.product_link.isnot(None)),
+        select(Cart.customer_link, Cart.product_link).where(Cart.product_link.isnot(None)),
+    )).all()
+
+    baskets = defaultdict(set)
+    for customer_id, product_id in rows:
+        baskets[customer_id].add(product_id)
+    return baskets
+
+
+def changed_customers(since) -> set:
+    """Customers whose orders or carts changed after `since`."""
+    rows = db.session.execute(union(
+        select(Order.customer_link).where(Order.date_updated > since),
+        select(Cart.customer_link).where(Cart.date_updated > since),
+    )).scalars().all()
+    return set(rows)
+
+
+def build_recommendations(top_k=10, full=False) -> int:
+    """
+    Rebuild the product_neighbor table from co-purchase data.
+
+    Similarity is cosine over the sparse product x customer matrix:
+    co(p, q) / sqrt(n(p) * n(q)), computed through an inverted index so only
+    non-zero pairs are touched. Unless `full`, only products in the baskets
+    of customers who changed since the last build are recomputed; removals
+    (deleted carts) are only picked up by a full build. Returns the number
+    of products refreshed.
+    """
+    baskets = customer_baskets()
+
+    buyers = defaultdict(list)
+    for customer_id, products in baskets.items():
+        for product_id in products:
+            buyers[product_id].append(customer_id)
+    counts = {product_id: len(customers) for product_id, customers in buyers.items()}
+
+    last_run = None if full else db.session.execute(select(func.max(ProductNeighbor.computed_at))).scalar()
+    if last_run is None:
+        targets = set(buyers)
+        db.session.execute(delete(ProductNeighbor))
+    else:
+        targets = set()
+        for customer_id in changed_customers(last_run):
+            targets |= baskets.get(customer_id, set())
+        if targets:
+            db.session.execute(delete(ProductNeighbor).where(ProductNeighbor.product_link.in_(targets)))
+
+    now = datetime.utcnow()
+    rows = []
+    for product_id in targets:
+        co = Counter()
+        for customer_id in buyers.get(product_id, ()):
+            co.update(baskets[customer_id])
+        co.pop(product_id, None)
+
+        scored = ((n / math.sqrt(counts[product_id] * counts[other]), other) for other, n in co.items())
+        for rank, (score, other) in enumerate(heapq.nlargest(top_k, scored)):
+            rows.append({'product_link': product_id, 'rank': rank, 'neighbor_link': other,
+                         'score': score, 'computed_at': now})
+
+    if rows:
+        db.session.execute(insert(ProductNeighbor), rows)
+    db.session.commit()
+    return len(targets)
+
+
+def also_bought(product_ids, limit=4) -> list:
+    """Neighbour product ids for `product_ids`, best first, in one indexed lookup."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+
+    rows = db.session.execute(
+        select(ProductNeighbor.neighbor_link, func.max(ProductNeighbor.score).label('score'))
+        .where(ProductNeighbor.product_link.in_(product_ids),
+               ProductNeighbor.neighbor_link.notin_(product_ids))
+        .group_by(ProductNeighbor.neighbor_link)
+        .order_by(func.max(ProductNeighbor.score).desc())
+        .limit(limit)
+    ).scalars().all()
+    return list(rows)
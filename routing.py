@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the read engine inside `use_read_engine()`
+    or `@read_only` views. Flushes always go to the primary, and every
+    other query does too unless a view opts in.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() \
+                and g.get('db_route') == 'read':
+            engine = current_app.extensions.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def set_wal_mode(dbapi_connection, connection_record):
+    # WAL lets the read-only connections keep reading a consistent
+    # snapshot while checkout and admin writes commit on the primary
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+def init_read_routing(app, db):
+    """
+    Create the read engine from SQLALCHEMY_READ_URI.
+
+    Defaults to a second, read-only connection to the same SQLite file;
+    point it at a replica to move storefront and report reads off the
+    primary. Set READ_ROUTING = False to send everything to the primary.
+    """
+    if not app.config.setdefault('READ_ROUTING', True):
+        return
+
+    primary_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    read_uri = app.config.get('SQLALCHEMY_READ_URI')
+
+    if primary_uri.startswith('sqlite:///'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', set_wal_mode)
+        if not read_uri:
+            read_uri = f"sqlite:///file:{primary_uri[len('sqlite:///'):]}?mode=ro&uri=true"
+
+    if read_uri:
+        app.extensions['read_engine'] = create_engine(read_uri)
+
+
+@contextmanager
+def use_read_engine():
+    previous = g.get('db_route')
+    g.db_route = 'read'
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+
+def read_only(view):
+    """Run a view's queries against the read engine."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_read_engine():
+            return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,179 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+from .extensions import db
+from .inventory import record_opening_balances
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to date with the models.
+
+    Missing tables, columns and indexes are created, then data backfills
+    run. Tables whose foreign keys or NOT NULL constraints were relaxed in
+    the models are rebuilt first, since SQLite cannot ALTER those. Must be
+    called in an app context.
+    """
+    engine = db.engine
+    for table in stale_tables(inspect(engine)):
+        rebuild_table(engine, table)
+
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                table.create(conn)
+                continue
+
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+        seed_categories(conn)
+        backfill_order_snapshots(conn)
+        record_opening_balances(conn)
+        backfill_timestamps(conn)
+        backfill_archive_order_ids(conn)
+
+
+def stale_tables(inspector) -> list:
+    """
+    Existing tables whose definition no longer matches the model: a foreign
+    key's ON DELETE changed, a NOT NULL column became nullable, or the model
+    asks for AUTOINCREMENT and the table lacks it.
+    """
+    with inspector.bind.connect() as conn:
+        ddl = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'table'")).all())
+
+    stale = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        columns = {c['name']: c for c in inspector.get_columns(table.name)}
+        on_delete = {
+            (tuple(fk['constrained_columns']), fk['referred_table']): (fk['options'].get('ondelete') or '').upper()
+            for fk in inspector.get_foreign_keys(table.name)
+        }
+
+        changed_fk = any(
+            on_delete.get(((fk.parent.name,), fk.column.table.name), (fk.ondelete or '').upper())
+            != (fk.ondelete or '').upper()
+            for fk in table.foreign_keys
+        )
+        relaxed = any(
+            column.nullable and not column.primary_key
+            and column.name in columns and not columns[column.name]['nullable']
+            for column in table.columns
+        )
+        lost_autoincrement = table.kwargs.get('sqlite_autoincrement') \
+            and 'AUTOINCREMENT' not in (ddl.get(table.name) or '').upper()
+        if changed_fk or relaxed or lost_autoincrement:
+            stale.append(table)
+    return stale
+
+
+def rebuild_table(engine, table):
+    """
+    Recreate `table` from the model and copy its rows across (SQLite's
+    create/copy/drop/rename procedure). Foreign keys are switched off so
+    the DROP doesn't cascade into rows that reference the table.
+    """
+    preparer = engine.dialect.identifier_preparer
+    name = preparer.format_table(table)
+    temp = preparer.quote(f'{table.name}_new')
+    ddl = str(CreateTable(table).compile(engine)).replace(f'CREATE TABLE {name}', f'CREATE TABLE {temp}', 1)
+
+    existing = {c['name'] for c in inspect(engine).get_columns(table.name)}
+    columns = ', '.join(preparer.quote(c.name) for c in table.columns if c.name in existing)
+
+    raw = engine.raw_connection()
+    connection = raw.driver_connection
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None  # issue BEGIN/COMMIT ourselves
+    cursor = connection.cursor()
+    try:
+        cursor.execute('PRAGMA foreign_keys=OFF')
+        cursor.execute('BEGIN')
+        try:
+            high_water = sequence_value(cursor, table.name)
+            cursor.execute(ddl)
+            cursor.execute(f'INSERT INTO {temp} ({columns}) SELECT {columns} FROM {name}')
+            cursor.execute(f'DROP TABLE {name}')
+            cursor.execute(f'ALTER TABLE {temp} RENAME TO {name}')
+            if high_water and table.kwargs.get('sqlite_autoincrement'):
+                # Keep ids of rows deleted before the rebuild from coming back
+                cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (high_water, table.name))
+                if not cursor.rowcount:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table.name, high_water))
+            if cursor.execute(f'PRAGMA foreign_key_check({name})').fetchall():
+                raise RuntimeError(f'Rebuilt table {table.name} has rows with broken foreign keys')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+    finally:
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+        connection.isolation_level = isolation_level
+        raw.close()
+
+
+def sequence_value(cursor, table_name):
+    """The table's AUTOINCREMENT high-water mark, or None."""
+    if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+        return None
+    row = cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table_name,)).fetchone()
+    return row[0] if row else None
+
+
+# (slug, name, template) of the categories the storefront has always had
+DEFAULT_CATEGORIES = [
+    ('phones', 'Phone', 'phones.html'),
+    ('laptop', 'Laptop', 'laptop.html'),
+    ('smart-watch', 'Watch', 'smart_watch.html'),
+    ('gaming', 'Gaming', 'gaming.html'),
+    ('tv', 'Television', 'tv.html'),
+    ('accessories', 'Accessories', 'accessories.html'),
+]
+
+
+def seed_categories(conn):
+    for position, (slug, name, template) in enumerate(DEFAULT_CATEGORIES):
+        conn.execute(text(
+            'INSERT INTO category (slug, name, template, position) '
+            'SELECT :slug, :name, :template, :position '
+            'WHERE NOT EXISTS (SELECT 1 FROM category WHERE slug = :slug)'
+        ), {'slug': slug, 'name': name, 'template': template, 'position': position})
+
+    # Products saved with only the free-text category name
+    conn.execute(text(
+        'UPDATE product SET category_id = (SELECT id FROM category WHERE category.name = product.category) '
+        'WHERE category_id IS NULL AND category IS NOT NULL'
+    ))
+
+
+def backfill_order_snapshots(conn):
+    # Orders placed before product details were snapshotted at checkout
+    conn.execute(text(
+        'UPDATE "order" SET '
+        'product_name = (SELECT product_name FROM product WHERE product.id = "order".product_link), '
+        'product_picture = (SELECT product_picture FROM product WHERE product.id = "order".product_link) '
+        'WHERE product_name IS NULL'
+    ))
+
+
+def backfill_timestamps(conn):
+    # Rows from before orders and carts were timestamped start aging now
+    conn.execute(text('UPDATE "order" SET date_updated = CURRENT_TIMESTAMP WHERE date_updated IS NULL'))
+    conn.execute(text('UPDATE cart SET date_updated = CURRENT_TIMESTAMP WHERE date_updated IS NULL'))
+
+
+def backfill_archive_order_ids(conn):
+    # Archives written before order_id existed reused the order id as their own
+    conn.execute(text('UPDATE order_archive SET order_id = id WHERE order_id IS NULL'))
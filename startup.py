@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+
+class StartupProfile:
+    """
+    Times the steps of create_app when STARTUP_PROFILE=1.
+
+    Each mark() records the wall time and the number of modules imported
+    since the previous mark; report() prints the table to stderr. For a
+    per-module breakdown run the worker under `python -X importtime`.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.steps = []
+        self._last = time.perf_counter()
+        self._modules = len(sys.modules)
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=os.environ.get('STARTUP_PROFILE', '') not in ('', '0'))
+
+    def mark(self, label):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        modules = len(sys.modules)
+        self.steps.append((label, (now - self._last) * 1000, modules - self._modules))
+        self._last = now
+        self._modules = modules
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = sum(ms for _, ms, _ in self.steps)
+        print(f"create_app startup profile ({total:.1f} ms, pid {os.getpid()})", file=sys.stderr)
+        for label, ms, modules in self.steps:
+            print(f"  {label:<20} {ms:8.1f} ms  {modules:4d} new modules", file=sys.stderr)
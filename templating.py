@@ -0,0 +1,36 @@
+from jinja2 import FileSystemBytecodeCache
+import os
+
+
+def init_templates(app):
+    """
+    Persist compiled templates under instance/jinja_cache so a fresh worker
+    loads bytecode instead of recompiling every template.
+
+    Must run before anything touches app.jinja_env.
+    """
+    cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+
+    # Unset follows app.debug (off under gunicorn); TEMPLATES_AUTO_RELOAD=0/1 forces it
+    if 'TEMPLATES_AUTO_RELOAD' in os.environ:
+        app.config['TEMPLATES_AUTO_RELOAD'] = os.environ['TEMPLATES_AUTO_RELOAD'] not in ('', '0')
+
+
+def warm_templates(app) -> int:
+    """Compile every template into the in-memory and bytecode caches; returns the count."""
+    env = app.jinja_env
+    names = env.list_templates(extensions=['html'])
+    # Keep all of them resident instead of evicting past the default 400
+    if env.cache is not None and getattr(env.cache, 'capacity', 0) < len(names):
+        env.cache.capacity = len(names)
+
+    compiled = 0
+    for name in names:
+        try:
+            env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            print("Template warm-up failed:", name, e)
+    return compiled
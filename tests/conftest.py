@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+# Compiling every template at boot only slows the suite down
+os.environ.setdefault('TEMPLATE_WARMUP', '0')
+
+from website import create_app
+from website.catalog import catalog
+from website.categories import category_registry
+from website.extensions import db, identity_cache, cart_counts, auth_limiter
+from website.models import Customer
+
+EMAIL = 'a@example.com'
+PASSWORD = 'secret1'
+
+
+def reset_singletons():
+    """Module-level caches outlive create_app(), so clear them between databases."""
+    catalog.invalidate()
+    category_registry.invalidate()
+    identity_cache.clear()
+    cart_counts.clear()
+    auth_limiter.reset()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App on a scratch database holding customer 1 (EMAIL / PASSWORD)."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    reset_singletons()
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, PASSWORD_HASH_ITERATIONS=1000)
+    with app.app_context():
+        db.create_all()
+        customer = Customer(email=EMAIL, username='a')
+        customer.set_password(PASSWORD)
+        db.session.add(customer)
+        db.session.commit()
+        yield app
+        db.session.remove()
+    reset_singletons()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client):
+    return client.post('/login', data={'email': EMAIL, 'password': PASSWORD})
@@ -0,0 +1,25 @@
+from website import admin
+from website.extensions import db
+from website.models import Category, Product
+
+from conftest import login
+
+
+def test_shop_items_search_matches_category_name(client, monkeypatch):
+    phones = Category(slug='phones', name='Phone', template='phones.html', position=1)
+    db.session.add(phones)
+    db.session.flush()
+    db.session.add_all([
+        Product(product_name='Pixel', current_price=10, previous_price=10, in_stock=1,
+                product_picture='/media/a.png', flash_sale=False, category_id=phones.id),
+        Product(product_name='Mouse', current_price=10, previous_price=10, in_stock=1,
+                product_picture='/media/b.png', flash_sale=False),
+    ])
+    db.session.commit()
+    login(client)
+
+    # shop_items.html isn't in the tree, so capture what the view would render
+    rendered = {}
+    monkeypatch.setattr(admin, 'render_template', lambda name, **context: rendered.update(context) or '')
+    client.get('/shop-items?search=phone')
+    assert [p.product_name for p in rendered['items']] == ['Pixel']
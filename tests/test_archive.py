@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from website.archive import archive_orders
+from website.extensions import db
+from website.inventory import adjust_stock
+from website.models import Order, OrderArchive, Product, InventoryLedger
+
+from conftest import login
+
+
+def place_closed_order(name):
+    order = Order(quantity=1, price=10, status='Delivered', payment_id='X',
+                  product_name=name, customer_link=1)
+    db.session.add(order)
+    db.session.commit()
+    order.date_updated = datetime.utcnow() - timedelta(days=200)
+    db.session.commit()
+    return order.id
+
+
+def test_archived_order_id_is_not_reused(app):
+    first = place_closed_order('first')
+    assert archive_orders(days=90) == 1
+
+    second = place_closed_order('second')
+    assert second > first
+    assert archive_orders(days=90) == 1
+
+    assert Order.query.count() == 0
+    archived = OrderArchive.query.order_by(OrderArchive.id).all()
+    assert [(a.order_id, a.product_name) for a in archived] == [(first, 'first'), (second, 'second')]
+
+
+def test_archiving_keeps_ledger_rows_tied_to_the_order(app):
+    product = Product(id=1, product_name='Phone', current_price=10, previous_price=10,
+                      in_stock=5, product_picture='/media/p.png', flash_sale=False)
+    db.session.add(product)
+    order_id = place_closed_order('Phone')
+    adjust_stock(product, -1, 'order', order=db.session.get(Order, order_id))
+    db.session.commit()
+
+    assert archive_orders(days=90) == 1
+
+    row = InventoryLedger.query.filter_by(reason='order').one()
+    assert row.order_link is None
+    archived = db.session.get(OrderArchive, row.archive_link)
+    assert archived.order_id == order_id
+    assert row.product_link == 1 and row.delta == -1
+
+
+def test_order_history_pages_through_archive(client):
+    for i in range(25):
+        place_closed_order(f'old {i}')
+    archive_orders(days=90)
+    for i in range(5):
+        db.session.add(Order(quantity=1, price=10, status='Pending', payment_id='X',
+                             product_name=f'new {i}', customer_link=1))
+    db.session.commit()
+
+    login(client)
+
+    seen = []
+    url = '/orders?archived=1'
+    while url:
+        page = client.get(url)
+        assert page.status_code == 200
+        text = page.get_data(as_text=True)
+        seen += [name for name in [f'new {i}' for i in range(5)] + [f'old {i}' for i in range(25)]
+                 if f'>{name}<' in text]
+        marker = 'href="/orders?'
+        url = None
+        for chunk in text.split(marker)[1:]:
+            link = '/orders?' + chunk.split('"')[0].replace('&amp;', '&')
+            if 'before' in link:
+                url = link
+    assert sorted(seen) == sorted([f'new {i}' for i in range(5)] + [f'old {i}' for i in range(25)])
+    assert len(seen) == 30
+
+
+def test_archive_link_shown_when_only_archived_orders_exist(client):
+    place_closed_order('old')
+    archive_orders(days=90)
+    login(client)
+
+    text = client.get('/orders').get_data(as_text=True)
+    assert 'You have no Orders' in text
+    assert 'Include archived orders' in text
+    assert '>old<' in client.get('/orders?archived=1').get_data(as_text=True)
@@ -0,0 +1,71 @@
+import pytest
+
+from website.extensions import db
+from website.guest_cart import MAX_LINES
+from website.models import Product, Cart
+
+from conftest import login
+
+
+@pytest.fixture(autouse=True)
+def products(app):
+    db.session.add_all([
+        Product(product_name='In stock', current_price=10, previous_price=10, in_stock=5,
+                product_picture='/media/a.png', flash_sale=False),
+        Product(product_name='Sold out', current_price=10, previous_price=10, in_stock=0,
+                product_picture='/media/b.png', flash_sale=False),
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('endpoint', ['/pluscart', '/minuscart', '/removecart'])
+def test_malformed_guest_cart_id_is_rejected(client, endpoint):
+    response = client.get(f'{endpoint}?cart_id=gabc')
+    assert response.status_code == 400
+
+
+def test_malformed_guest_cart_id_in_batch_is_rejected(client):
+    response = client.post('/cart/batch', json={'ops': [{'cart_id': 'gabc', 'delta': 1}]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [
+    '[]', '{"ops": {}}', '{"ops": [1]}', '{"ops": [{"cart_id": "g1", "delta": 1e400}]}',
+])
+def test_malformed_batch_is_rejected(client, body):
+    response = client.post('/cart/batch', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid batch'}
+
+
+def test_overflowing_batch_is_rejected_for_customers(client):
+    db.session.add(Cart(quantity=1, customer_link=1, product_link=1))
+    db.session.commit()
+    login(client)
+
+    for body in ['{"ops": [{"cart_id": 1, "set": 1e400}]}', '{"ops": [{"cart_id": 1e400}]}']:
+        response = client.post('/cart/batch', data=body, content_type='application/json')
+        assert response.status_code == 400
+
+
+def test_merge_leaves_sold_out_lines_alone(client):
+    db.session.add(Cart(quantity=2, customer_link=1, product_link=2))
+    db.session.commit()
+
+    with client.session_transaction() as session:
+        session['guest_cart'] = {'t': 4102444800, 'i': {'1': 2, '2': 3}}
+    login(client)
+
+    db.session.expire_all()
+    lines = {c.product_link: c.quantity for c in Cart.query.filter_by(customer_link=1)}
+    assert lines == {1: 2, 2: 2}
+
+
+def test_full_guest_cart_says_so(client):
+    with client.session_transaction() as session:
+        session['guest_cart'] = {'t': 4102444800, 'i': {str(100 + i): 1 for i in range(MAX_LINES)}}
+
+    response = client.get('/add-to-cart/1', follow_redirects=True)
+    assert 'Your cart is full' in response.get_data(as_text=True)
+    with client.session_transaction() as session:
+        assert '1' not in session['guest_cart']['i']
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import text
+
+from website.extensions import db
+from website.models import Customer, Product, Order
+from website.schema import upgrade_schema
+
+# "order" as the first release created it: product_link NOT NULL, no ON DELETE
+OLD_ORDER_TABLE = '''
+CREATE TABLE "order" (
+    id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    price FLOAT NOT NULL,
+    status VARCHAR(100) NOT NULL,
+    payment_id VARCHAR(1000) NOT NULL,
+    customer_link INTEGER NOT NULL,
+    product_link INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(customer_link) REFERENCES customer (id),
+    FOREIGN KEY(product_link) REFERENCES product (id)
+)
+'''
+
+
+@pytest.fixture(autouse=True)
+def old_order_table(app):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE "order"'))
+        conn.execute(text(OLD_ORDER_TABLE))
+        conn.execute(text("INSERT INTO product (id, product_name, current_price, previous_price, in_stock, product_picture, flash_sale) "
+                          "VALUES (1, 'Phone', 10, 10, 3, '/media/p.png', 0)"))
+        conn.execute(text("INSERT INTO \"order\" (id, quantity, price, status, payment_id, customer_link, product_link) "
+                          "VALUES (1, 1, 10, 'Pending', 'X', 1, 1)"))
+
+
+def test_upgrade_lets_products_with_orders_be_deleted():
+    upgrade_schema()
+
+    order = db.session.get(Order, 1)
+    assert order.product_name == 'Phone'
+
+    db.session.delete(db.session.get(Product, 1))
+    db.session.commit()
+
+    db.session.expire_all()
+    order = db.session.get(Order, 1)
+    assert order.product_link is None
+    assert order.product_name == 'Phone'
+    assert db.session.get(Customer, 1) is not None
+
+
+def test_upgrade_is_idempotent():
+    upgrade_schema()
+    upgrade_schema()
+    assert Order.query.count() == 1
+
+
+def test_upgrade_keeps_deleted_order_ids_retired():
+    upgrade_schema()
+    db.session.delete(db.session.get(Order, 1))
+    db.session.commit()
+
+    order = Order(quantity=1, price=10, status='Pending', payment_id='Y', customer_link=1, product_link=1)
+    db.session.add(order)
+    db.session.commit()
+    assert order.id == 2
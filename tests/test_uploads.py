@@ -0,0 +1,18 @@
+import os
+import time
+
+from website.uploads import partial_path, expire_partial_uploads
+
+
+def test_stale_partial_uploads_expire(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'instance_path', str(tmp_path))
+    stale, fresh = partial_path('stale-upload'), partial_path('fresh-upload')
+    for path in (stale, fresh):
+        with open(path, 'wb') as part:
+            part.write(b'\x89PNG')
+    day_ago = time.time() - 25 * 3600
+    os.utime(stale, (day_ago, day_ago))
+
+    assert expire_partial_uploads(hours=24) == 1
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
@@ -0,0 +1,196 @@
+from flask import current_app
+from werkzeug.utils import secure_filename
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+CHUNK_SIZE = 64 * 1024
+
+# Magic numbers of the image types we accept, checked against the first chunk.
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+DEFAULT_SIZE_LIMITS = {
+    'image/png': 8 * 1024 * 1024,
+    'image/jpeg': 8 * 1024 * 1024,
+    'image/gif': 4 * 1024 * 1024,
+    'image/webp': 8 * 1024 * 1024,
+}
+
+UPLOAD_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+class UploadError(ValueError):
+    """Raised when an upload is rejected (bad type, too large, bad offset)."""
+
+
+def sniff_content_type(head: bytes):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def size_limits() -> dict:
+    return current_app.config.get('UPLOAD_SIZE_LIMITS', DEFAULT_SIZE_LIMITS)
+
+
+def check_content_length(length) -> None:
+    """Reject a request up front when its declared size exceeds every limit."""
+    if length is not None and length > max(size_limits().values()):
+        raise UploadError("File is too large.")
+
+
+def stream_to_media(stream, filename: str, subdir: str = '') -> str:
+    """
+    Copy `stream` into the media folder chunk by chunk.
+
+    The data goes to a temp file next to its destination while being hashed
+    and sniffed; the type's size limit is enforced as the bytes are copied,
+    and the finished file is renamed into place atomically. Returns the
+    /media URL.
+    """
+    filename = secure_filename(filename or '')
+    if not filename:
+        raise UploadError("Invalid file name.")
+
+    upload_dir = os.path.join(current_app.config['MEDIA_FOLDER'], subdir)
+    os.makedirs(upload_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    content_type = None
+    limit = None
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                if content_type is None:
+                    content_type = sniff_content_type(chunk)
+                    if content_type is None:
+                        raise UploadError("Unsupported file type.")
+                    limit = size_limits().get(content_type, 0)
+
+                size += len(chunk)
+                if size > limit:
+                    raise UploadError("File is too large.")
+
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        if content_type is None:
+            raise UploadError("Empty file.")
+
+        # Prefix with the content hash so two different images that share a
+        # name don't overwrite each other.
+        stored_name = f"{digest.hexdigest()[:12]}_{filename}"
+        os.replace(tmp_path, os.path.join(upload_dir, stored_name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    parts = ['/media', subdir, stored_name] if subdir else ['/media', stored_name]
+    return '/'.join(parts)
+
+
+def save_upload(file, subdir: str = '') -> str:
+    """
+    Stream a Werkzeug FileStorage into the media folder.
+
+    Werkzeug has already spooled the whole multipart body by then, so for
+    form posts only MAX_CONTENT_LENGTH bounds what the client can send; the
+    chunked endpoints below are the path that stops a transfer early.
+    """
+    return stream_to_media(file.stream, file.filename, subdir)
+
+
+# ---------------- Resumable Chunked Uploads ---------------- #
+
+def partial_dir() -> str:
+    return os.path.join(current_app.instance_path, 'uploads')
+
+
+def partial_path(upload_id: str) -> str:
+    if not UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadError("Invalid upload id.")
+    os.makedirs(partial_dir(), exist_ok=True)
+    return os.path.join(partial_dir(), f"{upload_id}.part")
+
+
+def partial_offset(upload_id: str) -> int:
+    path = partial_path(upload_id)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def append_chunk(upload_id: str, offset: int, stream) -> int:
+    """
+    Append one chunk to a partial upload and return the new offset.
+
+    The client sends the offset it believes it is at; a mismatch raises
+    UploadError so it can resume from `partial_offset` instead.
+    """
+    path = partial_path(upload_id)
+    current = partial_offset(upload_id)
+    if offset != current:
+        raise UploadError("Offset mismatch.")
+
+    limit = max(size_limits().values())
+    with open(path, 'ab') as part:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            current += len(chunk)
+            if current > limit:
+                part.close()
+                os.remove(path)
+                raise UploadError("File is too large.")
+            part.write(chunk)
+
+    return current
+
+
+def finish_chunked(upload_id: str, filename: str, subdir: str = '') -> str:
+    """Move a completed partial upload into the media folder."""
+    path = partial_path(upload_id)
+    if not os.path.exists(path):
+        raise UploadError("Unknown upload.")
+    try:
+        with open(path, 'rb') as part:
+            return stream_to_media(part, filename, subdir)
+    finally:
+        os.remove(path)
+
+
+def expire_partial_uploads(hours=24) -> int:
+    """Delete partial uploads not appended to for `hours`; returns the number removed."""
+    cutoff = time.time() - hours * 3600
+    removed = 0
+    try:
+        names = os.listdir(partial_dir())
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(partial_dir(), name)
+        try:
+            if name.endswith('.part') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            # Finished or removed by a request meanwhile
+            pass
+    return removed
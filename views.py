@@ -1,14 +1,21 @@
 # Updated views.py with fixed minuscart route
 from flask import Blueprint, render_template, flash, redirect, request, jsonify, url_for, current_app
 from flask_login import login_required, current_user
-from intasend import APIService
+from sqlalchemy import literal
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-from .models import Product, Cart, Order
+from .models import Product, Cart, Order, OrderArchive
 from .models import Customer
-from .extensions import db
+from .extensions import db, cart_counts, invalidation_bus
+from .uploads import save_upload, UploadError
+from . import guest_cart
+from .catalog import catalog
+from .categories import category_registry
+from .inventory import adjust_stock
+from .routing import read_only
+from .checkout import make_quote, load_quote, validate_quote, QuoteMismatch
+from .recommendations import also_bought
 import sqlite3
-from werkzeug.utils import secure_filename
-import os
 
 
 views = Blueprint('views', __name__)
@@ -17,29 +24,51 @@ API_PUBLISHABLE_KEY = 'YOUR_PUBLISHABLE_KEY'
 API_TOKEN = 'YOUR_API_TOKEN'
 
 
+def also_bought_rows(product_ids) -> list:
+    """'Customers also bought' listing rows; neighbour ids come from one indexed lookup."""
+    rows = (catalog.get(pid) for pid in also_bought(product_ids))
+    return [row for row in rows if row is not None]
+
+
 @views.app_context_processor
 def inject_cart_count():
-    if current_user.is_authenticated:
+    if not current_user.is_authenticated:
+        cart_count = guest_cart.count()
+    elif not invalidation_bus.shared:
+        # Other workers wouldn't hear about cart changes, so don't cache
         cart_count = Cart.query.filter_by(customer_link=current_user.id).count()
     else:
-        cart_count = 0
+        cart_count = cart_counts.get(current_user.id)
+        if cart_count is None:
+            cart_count = Cart.query.filter_by(customer_link=current_user.id).count()
+            cart_counts.set(current_user.id, cart_count)
     return dict(cart_count=cart_count)
 
 
+def category_counts() -> dict:
+    """slug -> product count for the category menu, from the catalog read model."""
+    return {info.slug: count for info, count in category_registry.with_counts(catalog)}
+
+
 @views.route('/')
+@read_only
 def home():
     category = request.args.get('category')
-    items = Product.query.filter_by(category=category, flash_sale=True).all() if category \
-             else Product.query.filter_by(flash_sale=True).all()
+    if category:
+        info = category_registry.lookup(category)
+        items = catalog.flash_sale(info.id) if info else []
+    else:
+        items = catalog.flash_sale()
 
-    return render_template('home.html', items=items)
+    return render_template('home.html', items=items, category_counts=category_counts())
 
 
 @views.route('/search', methods=['GET', 'POST'])
+@read_only
 def search():
     if request.method == 'POST':
         search_query = request.form.get('search')
-        items = Product.query.filter(Product.product_name.ilike(f'%{search_query}%')).all()
+        items = catalog.search(search_query)
         return render_template('search.html', items=items,
                                cart=Cart.query.filter_by(customer_link=current_user.id).all()
                                if current_user.is_authenticated else [])
@@ -47,16 +76,56 @@ def search():
     return render_template('search.html')
 
 
-@views.route('/category/<string:category_name>')
-def products_by_category(category_name):
-    items = Product.query.filter_by(category=category_name).all()
-    return render_template('category.html', items=items, category=category_name)
+PRODUCTS_PER_PAGE = 24
+
+
+@views.route('/category/<string:slug>')
+@views.route('/phones', defaults={'slug': 'phones'}, endpoint='phones')
+@views.route('/laptop', defaults={'slug': 'laptop'}, endpoint='laptop')
+@views.route('/smart-watch', defaults={'slug': 'smart-watch'}, endpoint='smart_watch')
+@views.route('/gaming', defaults={'slug': 'gaming'}, endpoint='gaming')
+@views.route('/tv', defaults={'slug': 'tv'}, endpoint='tv')
+@views.route('/accessories', defaults={'slug': 'accessories'}, endpoint='accessories')
+@read_only
+def products_by_category(slug):
+    """Every category page, paginated with ?page=N from the cached read model."""
+    info = category_registry.lookup(slug)
+    if info is None:
+        return render_template('404.html'), 404
+
+    rows = catalog.by_category(info.id)
+    pages = max(1, -(-len(rows) // PRODUCTS_PER_PAGE))
+    page = min(max(request.args.get('page', 1, type=int), 1), pages)
+    items = rows[(page - 1) * PRODUCTS_PER_PAGE:page * PRODUCTS_PER_PAGE]
+
+    return render_template(
+        info.template or 'category.html',
+        items=items,
+        category=info.name,
+        active_category=info.slug,
+        category_counts=category_counts(),
+        page=page,
+        pages=pages
+    )
 
 
 @views.route('/add-to-cart/<int:item_id>')
-@login_required
 def add_to_cart(item_id):
-    item_to_add = Product.query.get(item_id)
+    item_to_add = Product.query.get_or_404(item_id)
+
+    # Guests build their cart in the session cookie; merged into Cart on login
+    if not current_user.is_authenticated:
+        quantity = guest_cart.load().get(item_id, 0)
+        if quantity >= item_to_add.in_stock:
+            flash(f"Only {item_to_add.in_stock} item(s) in stock." if quantity else "This item is out of stock.")
+            return redirect(request.referrer or url_for('views.home'))
+
+        if not guest_cart.set_quantity(item_id, quantity + 1):
+            flash(f"Your cart is full ({guest_cart.MAX_LINES} items). Log in to add more.")
+            return redirect(request.referrer or url_for('views.home'))
+        flash(f"{item_to_add.product_name} added to cart")
+        return redirect(request.referrer or url_for('views.home'))
+
     item_exists = Cart.query.filter_by(product_link=item_id, customer_link=current_user.id).first()
 
     # STOCK CHECK
@@ -77,22 +146,58 @@ def add_to_cart(item_id):
         new_item = Cart(quantity=1, product_link=item_to_add.id, customer_link=current_user.id)
         db.session.add(new_item)
         db.session.commit()
+        invalidation_bus.publish('cart', current_user.id)
         flash(f"{item_to_add.product_name} added to cart")
 
     return redirect(request.referrer)
 
 
 @views.route('/cart')
-@login_required
 def show_cart():
+    if not current_user.is_authenticated:
+        cart = guest_cart.lines()
+        amount = sum(item.product.current_price * item.quantity for item in cart)
+        return render_template('cart.html', cart=cart, amount=amount, total=amount,
+                               also_bought=also_bought_rows(item.product.id for item in cart))
+
     cart = Cart.query.filter_by(customer_link=current_user.id).all()
     amount = sum(item.product.current_price * item.quantity for item in cart)
-    return render_template('cart.html', cart=cart, amount=amount, total=amount)
+    return render_template('cart.html', cart=cart, amount=amount, total=amount,
+                           also_bought=also_bought_rows(item.product_link for item in cart if item.product_link))
+
+
+def guest_cart_update(step):
+    """pluscart/minuscart/removecart for guest lines (cart_id "g<product_id>")."""
+    product_id = guest_cart.product_id_from(request.args.get('cart_id'))
+    if product_id is None:
+        return jsonify({'error': 'Invalid cart item'}), 400
+    product = Product.query.get_or_404(product_id)
+    quantity = guest_cart.load().get(product_id, 0)
+
+    if step > 0 and quantity >= product.in_stock:
+        return jsonify({'quantity': quantity, 'limited': True, 'max_stock': product.in_stock})
+
+    quantity = quantity + step if step else 0
+    guest_cart.set_quantity(product_id, quantity)
+    amount = guest_cart.total()
+
+    return jsonify({
+        'quantity': max(quantity, 0),
+        'amount': amount,
+        'total': amount,
+        'limited': False,
+        'removed': quantity <= 0,
+        'cart_count': guest_cart.count()
+    })
 
 
 @views.route('/pluscart')
-@login_required
 def plus_cart():
+    if guest_cart.is_guest_id(request.args.get('cart_id')):
+        return guest_cart_update(1)
+    if not current_user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+
     cart_item = Cart.query.get(request.args.get('cart_id'))
     product = cart_item.product
 
@@ -120,8 +225,12 @@ def plus_cart():
 
 
 @views.route('/minuscart')
-@login_required
 def minus_cart():
+    if guest_cart.is_guest_id(request.args.get('cart_id')):
+        return guest_cart_update(-1)
+    if not current_user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+
     cart_item = Cart.query.get(request.args.get('cart_id'))
 
     if not cart_item:
@@ -132,6 +241,7 @@ def minus_cart():
     if cart_item.quantity <= 0:
         db.session.delete(cart_item)
         db.session.commit()
+        invalidation_bus.publish('cart', current_user.id)
 
         cart = Cart.query.filter_by(customer_link=current_user.id).all()
         amount = sum(item.product.current_price * item.quantity for item in cart)
@@ -157,13 +267,18 @@ def minus_cart():
 
 
 @views.route('/removecart')
-@login_required
 def remove_cart():
+    if guest_cart.is_guest_id(request.args.get('cart_id')):
+        return guest_cart_update(0)
+    if not current_user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+
     cart_id = request.args.get('cart_id')
     cart_item = Cart.query.get(cart_id)
 
     db.session.delete(cart_item)
     db.session.commit()
+    invalidation_bus.publish('cart', current_user.id)
 
     cart = Cart.query.filter_by(customer_link=current_user.id).all()
     amount = sum(item.product.current_price * item.quantity for item in cart)
@@ -175,6 +290,105 @@ def remove_cart():
     })
 
 
+def apply_cart_op(quantity, op, stock):
+    """New quantity for one batch op, clamped to stock; returns (quantity, limited)."""
+    if op.get('remove'):
+        return 0, False
+
+    target = int(op['set']) if 'set' in op else quantity + int(op.get('delta', 0))
+    if target > stock:
+        return max(min(quantity, stock), min(target, stock)), True
+    return max(target, 0), False
+
+
+@views.route('/cart/batch', methods=['POST'])
+def cart_batch():
+    """
+    Apply a list of {cart_id, delta|set|remove} ops in one transaction.
+
+    cart.html debounces +/- clicks into a single call here instead of one
+    request and one commit per click.
+    """
+    payload = request.get_json(silent=True)
+    ops = payload.get('ops', []) if isinstance(payload, dict) else None
+    if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+        return jsonify({'error': 'Invalid batch'}), 400
+    quantities, removed, limited = {}, [], {}
+
+    try:
+        if not current_user.is_authenticated:
+            if not all(guest_cart.is_guest_id(op.get('cart_id')) for op in ops):
+                return current_app.login_manager.unauthorized()
+
+            product_ids = [guest_cart.product_id_from(op['cart_id']) for op in ops]
+            if None in product_ids:
+                raise ValueError('invalid guest cart id')
+
+            items = guest_cart.load()
+            stock = dict(
+                db.session.query(Product.id, Product.in_stock)
+                .filter(Product.id.in_(product_ids)).all()
+            )
+            for op in ops:
+                product_id = guest_cart.product_id_from(op['cart_id'])
+                if product_id not in stock or (product_id not in items and len(items) >= guest_cart.MAX_LINES):
+                    continue
+                quantity, was_limited = apply_cart_op(items.get(product_id, 0), op, stock[product_id])
+                items[product_id] = quantity
+                quantities[op['cart_id']] = quantity
+                if was_limited:
+                    limited[op['cart_id']] = stock[product_id]
+                if quantity <= 0:
+                    removed.append(op['cart_id'])
+
+            guest_cart.store(items)
+            amount = guest_cart.total()
+            return jsonify({
+                'quantities': quantities, 'removed': removed, 'limited': limited,
+                'amount': amount, 'total': amount, 'cart_count': guest_cart.count()
+            })
+
+        ids = [int(op['cart_id']) for op in ops]
+        rows = {
+            c.id: c for c in Cart.query.options(joinedload(Cart.product))
+            .filter(Cart.id.in_(ids), Cart.customer_link == current_user.id).all()
+        }
+
+        for op in ops:
+            row = rows.get(int(op['cart_id']))
+            if row is None or (row.product is None and not op.get('remove')):
+                continue
+
+            stock = row.product.in_stock if row.product else 0
+            quantity, was_limited = apply_cart_op(row.quantity, op, stock)
+            quantities[row.id] = quantity
+            if was_limited:
+                limited[row.id] = stock
+
+            if quantity <= 0:
+                db.session.delete(row)
+                del rows[row.id]
+                removed.append(row.id)
+            else:
+                row.quantity = quantity
+
+        db.session.commit()
+        if removed:
+            invalidation_bus.publish('cart', current_user.id)
+
+    except (KeyError, TypeError, ValueError, OverflowError):
+        db.session.rollback()
+        return jsonify({'error': 'Invalid batch'}), 400
+
+    cart = Cart.query.options(joinedload(Cart.product)).filter_by(customer_link=current_user.id).all()
+    amount = sum(item.product.current_price * item.quantity for item in cart if item.product)
+
+    return jsonify({
+        'quantities': quantities, 'removed': removed, 'limited': limited,
+        'amount': amount, 'total': amount, 'cart_count': len(cart)
+    })
+
+
 @views.route('/direct-order/<int:product_id>')
 @login_required
 def direct_order(product_id):
@@ -202,7 +416,8 @@ def direct_order(product_id):
         shipping=shipping,
         customer_address=current_user.address,
         payment_mode="Cash on Delivery",
-        direct_item_id=product.id
+        direct_item_id=product.id,
+        also_bought=also_bought_rows([product.id])
     )
 
 
@@ -221,7 +436,7 @@ def place_order():
         flash("No items selected!", "warning")
         return redirect(url_for('views.show_cart'))
 
-    selected_cart_items = Cart.query.filter(
+    selected_cart_items = Cart.query.options(joinedload(Cart.product)).filter(
         Cart.id.in_(selected_ids),
         Cart.customer_link == current_user.id
     ).all()
@@ -257,7 +472,8 @@ def place_order():
         total_with_shipping=total + shipping,
         shipping=shipping,
         customer_address=current_user.address,
-        payment_mode="Cash on Delivery"
+        payment_mode="Cash on Delivery",
+        quote=make_quote(current_user.id, selected_cart_items)
     )
 
 
@@ -279,32 +495,52 @@ def confirm_order():
             price=product.current_price,
             status="Pending",
             payment_id="DIRECT_ORDER",
+            product_name=product.product_name,
+            product_picture=product.product_picture,
             product_link=product.id,
             customer_link=current_user.id
         )
 
         db.session.add(order)
-        product.in_stock = max(0, product.in_stock - 1)
+        adjust_stock(product, -1, 'order', order=order)
         db.session.commit()
+        invalidation_bus.publish('product', product.id)
 
         flash("Order placed successfully!", "success")
         return redirect("/orders")
 
-    selected_ids = request.form.getlist("selected_items[]")
+    # Reviewed orders carry a signed quote: one query re-validates it
+    quote = request.form.get("quote")
+    if quote:
+        lines = load_quote(quote, current_user.id)
+        if lines is None:
+            flash("Your order review expired. Please review your order again.", "warning")
+            return redirect("/cart")
 
-    if not selected_ids:
-        flash("No items selected to confirm.", "warning")
-        return redirect("/cart")
+        try:
+            selected_cart_items = validate_quote(lines, current_user.id)
+        except QuoteMismatch as e:
+            flash(f"{e} Please review your order again.", "warning")
+            return redirect("/cart")
 
-    selected_cart_items = Cart.query.filter(
-        Cart.id.in_(selected_ids),
-        Cart.customer_link == current_user.id
-    ).all()
+    else:
+        selected_ids = request.form.getlist("selected_items[]")
+
+        if not selected_ids:
+            flash("No items selected to confirm.", "warning")
+            return redirect("/cart")
+
+        selected_cart_items = Cart.query.filter(
+            Cart.id.in_(selected_ids),
+            Cart.customer_link == current_user.id
+        ).all()
 
     if not selected_cart_items:
         flash("Selected items invalid or no longer available.", "danger")
         return redirect("/cart")
 
+    changed_products = {item.product_link for item in selected_cart_items}
+
     try:
         for item in selected_cart_items:
             order = Order(
@@ -312,18 +548,23 @@ def confirm_order():
                 price=item.product.current_price,
                 status="Pending",
                 payment_id="CART_ORDER",
+                product_name=item.product.product_name,
+                product_picture=item.product.product_picture,
                 product_link=item.product_link,
                 customer_link=item.customer_link
             )
             db.session.add(order)
 
-            prod = Product.query.get(item.product_link)
+            prod = db.session.get(Product, item.product_link)  # identity map when quoted
             if prod:
-                prod.in_stock = max(0, prod.in_stock - item.quantity)
+                adjust_stock(prod, -item.quantity, 'order', order=order)
 
             db.session.delete(item)
 
         db.session.commit()
+        for product_id in changed_products:
+            invalidation_bus.publish('product', product_id)
+        invalidation_bus.publish('cart', current_user.id)
         flash("Order placed successfully!", "success")
         return redirect("/orders")
 
@@ -348,11 +589,13 @@ def cancel_order(order_id):
 
     product = Product.query.get(order.product_link)
     if product:
-        product.in_stock += order.quantity
+        adjust_stock(product, order.quantity, 'cancel', order=order)
 
     order.status = "Canceled"
 
     db.session.commit()
+    if product:
+        invalidation_bus.publish('product', product.id)
 
     flash("Order canceled successfully! Stock restored.", "success")
     return redirect(url_for('views.order'))
@@ -366,26 +609,70 @@ def upload_profile_picture(id):
         flash("Invalid file", "error")
         return redirect(url_for("auth.profile", customer_id=id))
 
-    filename = secure_filename(file.filename)
-
-    upload_dir = os.path.join(current_app.config["MEDIA_FOLDER"], "profile_pictures")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    file_path = os.path.join(upload_dir, filename)
-    file.save(file_path)
+    try:
+        picture_url = save_upload(file, "profile_pictures")
+    except UploadError as e:
+        flash(str(e), "error")
+        return redirect(url_for("auth.profile", customer_id=id))
 
     user = Customer.query.get(id)
-    user.profile_picture = f"/media/profile_pictures/{filename}"  # <-- FIXED
+    user.profile_picture = picture_url
     db.session.commit()
+    invalidation_bus.publish('customer', user.id)
 
     flash("Profile picture updated successfully!", "success")
     return redirect(url_for("auth.profile", customer_id=id))
 
+ORDERS_PER_PAGE = 20
+
+
+def order_page(model, before, archived, limit):
+    """One keyset page of the customer's rows from Order or OrderArchive, by that table's id."""
+    query = db.session.query(
+        model.id, model.quantity, model.price, model.status,
+        model.product_name, model.product_picture,
+        literal(archived).label('archived')
+    ).filter(model.customer_link == current_user.id)
+
+    if before:
+        query = query.filter(model.id < before)
+
+    return query.order_by(model.id.desc()).limit(limit).all()
+
+
 @views.route('/orders')
 @login_required
+@read_only
 def order():
-    orders = Order.query.filter_by(customer_link=current_user.id).all()
-    return render_template('orders.html', orders=orders)
+    """
+    Newest-first order history, keyset-paginated with ?before=<order id>.
+
+    Reads only the Order snapshot columns, so each page is a single indexed
+    query however long the history grows. With ?archived=1, archived orders
+    follow once the live ones run out, paged by ?archived_before=<archive
+    id>; the two tables have separate id spaces, so each keeps its own key.
+    """
+    before = request.args.get('before', type=int)
+    archived_before = request.args.get('archived_before', type=int)
+    include_archive = request.args.get('archived', type=int) == 1
+
+    orders = [] if archived_before else order_page(Order, before, False, ORDERS_PER_PAGE + 1)
+    if include_archive and len(orders) <= ORDERS_PER_PAGE:
+        orders += order_page(OrderArchive, archived_before, True, ORDERS_PER_PAGE + 1 - len(orders))
+
+    next_page = None
+    if len(orders) > ORDERS_PER_PAGE:
+        orders = orders[:ORDERS_PER_PAGE]
+        last = orders[-1]
+        if last.archived:
+            next_page = {'archived_before': last.id, 'archived': 1}
+        elif include_archive:
+            next_page = {'before': last.id, 'archived': 1}
+        else:
+            next_page = {'before': last.id}
+
+    return render_template('orders.html', orders=orders, next_page=next_page,
+                           include_archive=include_archive)
 
 
 @views.route('/order/received/<int:order_id>', methods=['POST'])
@@ -417,36 +704,3 @@ def mark_order_not_received(order_id):
 @views.route('/about-us')
 def about_us():
     return render_template('about_us.html')
-
-
-@views.route('/phones')
-def phones():
-    items = Product.query.filter_by(category="Phone").all()
-    return render_template("phones.html", items=items, active_category='phones')
-
-
-@views.route('/laptop')
-def laptop():
-    items = Product.query.filter_by(category="Laptop").all()
-    return render_template("laptop.html", items=items, active_category='laptop')
-
-
-@views.route('/smart-watch')
-def smart_watch():
-    items = Product.query.filter_by(category="Watch").all()
-    return render_template("smart_watch.html", items=items, active_category='smart-watch')
-
-@views.route('/gaming')
-def gaming():
-    items = Product.query.filter_by(category="Gaming").all()
-    return render_template("gaming.html", items=items, active_category='gaming')
-
-@views.route('/tv')
-def tv():
-    items = Product.query.filter_by(category="Television").all()
-    return render_template("tv.html", items=items, active_category='tv')
-
-@views.route('/accessories')
-def accessories():
-    items = Product.query.filter_by(category="Accessories").all()
-    return render_template("accessories.html", items=items, active_category='accessories')
\ No newline at end of file